@@ -249,13 +249,12 @@ class AccountService:
         accounts = []
 
         for acc_data in accounts_data:
-            node_count = await db.get_account_node_count(acc_data["id"])
             accounts.append(AccountInfo(
                 id=acc_data["id"],
                 account_key_prefix=acc_data["account_key_prefix"],
                 status=AccountStatus(acc_data["status"]),
                 total_earnings=acc_data["total_earnings"],
-                node_count=node_count,
+                node_count=acc_data.get("node_count") or 0,
                 created_at=acc_data["created_at"],
                 last_activity_at=acc_data.get("last_activity_at")
             ))
@@ -4,7 +4,9 @@ Iris Authentication
 JWT-based authentication for users.
 """
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
@@ -27,6 +29,12 @@ ACCESS_TOKEN_EXPIRE_HOURS = 24
 # Security scheme
 security = HTTPBearer()
 
+# bcrypt releases the GIL, so hashing parallelizes across one thread per core
+_hash_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1,
+    thread_name_prefix="bcrypt"
+)
+
 
 class TokenData(BaseModel):
     user_id: str
@@ -47,6 +55,20 @@ def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, verify_password, plain_password, hashed_password
+    )
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, hash_password, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -120,7 +142,7 @@ async def register_user(user_data: UserCreate) -> User:
 
     # Create user
     user_id = generate_id()
-    password_hash = hash_password(user_data.password)
+    password_hash = await hash_password_async(user_data.password)
 
     user_record = await db.create_user(
         id=user_id,
@@ -153,7 +175,7 @@ async def login_user(credentials: UserLogin) -> TokenResponse:
             detail="Invalid email or password"
         )
 
-    if not verify_password(credentials.password, user_data["password_hash"]):
+    if not await verify_password_async(credentials.password, user_data["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -7,9 +7,10 @@ Includes public chat interface with rate limiting.
 
 import asyncio
 import json
+import time
 from pathlib import Path
 from typing import Optional
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Request, HTTPException, status
@@ -20,6 +21,7 @@ from pydantic import BaseModel
 from .database import db
 from .node_registry import node_registry
 from .account_service import account_service
+from .accounts import AccountKeyGenerator
 from .streaming import streaming_manager
 from shared.models import TaskMode, FileAttachment
 
@@ -56,6 +58,12 @@ UNLIMITED_ACCOUNT_KEYS = {
     "4864579347191328",
 }
 
+# Recently verified account keys: key hash -> (is_valid, expires_at)
+# Keyed by hash so raw keys are never kept in memory
+ACCOUNT_KEY_CACHE_TTL_SECONDS = 300
+ACCOUNT_KEY_CACHE_MAX_SIZE = 50_000
+account_key_cache: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+
 
 class ChatRequest(BaseModel):
     """Request model for chat messages."""
@@ -73,7 +81,9 @@ def get_client_id(request: Request) -> str:
     """Get a unique identifier for the client (IP-based)."""
     forwarded = request.headers.get("X-Forwarded-For")
     if forwarded:
-        return forwarded.split(",")[0].strip()
+        # Only the first hop matters; slice instead of splitting the whole list
+        comma = forwarded.find(",")
+        return forwarded[:comma].strip() if comma != -1 else forwarded.strip()
     return request.client.host if request.client else "unknown"
 
 
@@ -128,12 +138,24 @@ async def verify_and_upgrade_limit(client_id: str, account_key: str) -> bool:
         rate_limit_store[client_id]["unlimited"] = True
         return True
 
-    # Check against account service
-    account_info = await account_service.get_account_by_key(account_key)
-    if account_info:
+    # Check recently verified keys before hitting the database
+    key_hash = AccountKeyGenerator.hash_key(account_key)
+    now = time.monotonic()
+    cached = account_key_cache.get(key_hash)
+    if cached and cached[1] > now:
+        account_key_cache.move_to_end(key_hash)
+        is_valid = cached[0]
+    else:
+        account_info = await account_service.get_account_by_key(account_key)
+        is_valid = account_info is not None
+        account_key_cache[key_hash] = (is_valid, now + ACCOUNT_KEY_CACHE_TTL_SECONDS)
+        account_key_cache.move_to_end(key_hash)
+        if len(account_key_cache) > ACCOUNT_KEY_CACHE_MAX_SIZE:
+            account_key_cache.popitem(last=False)
+
+    if is_valid:
         rate_limit_store[client_id]["account_verified"] = True
-        return True
-    return False
+    return is_valid
 
 
 @router.get("/dashboard", response_class=HTMLResponse)
@@ -4,10 +4,14 @@ Iris Database Layer
 SQLite database with async support using aiosqlite.
 """
 
+import asyncio
+import os
+import sqlite3
+import time
 import aiosqlite
+from contextlib import asynccontextmanager
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, Any
+from typing import AsyncIterator, Optional, Any
 import structlog
 
 logger = structlog.get_logger()
@@ -23,7 +27,8 @@ CREATE TABLE IF NOT EXISTS accounts (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     status TEXT DEFAULT 'active',
     total_earnings REAL DEFAULT 0.0,
-    last_activity_at TIMESTAMP
+    last_activity_at TIMESTAMP,
+    node_count INTEGER DEFAULT 0
 );
 
 -- Users of the club (admin only - legacy)
@@ -142,28 +147,284 @@ CREATE TABLE IF NOT EXISTS node_tokens (
 CREATE INDEX IF NOT EXISTS idx_accounts_key_hash ON accounts(account_key_hash);
 CREATE INDEX IF NOT EXISTS idx_accounts_prefix ON accounts(account_key_prefix);
 CREATE INDEX IF NOT EXISTS idx_nodes_account ON nodes(account_id);
-CREATE INDEX IF NOT EXISTS idx_tasks_user ON tasks(user_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON tasks(user_id, created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
-CREATE INDEX IF NOT EXISTS idx_subtasks_task ON subtasks(task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_subtasks_task_status ON subtasks(task_id, status);
 CREATE INDEX IF NOT EXISTS idx_subtasks_node ON subtasks(node_id);
 CREATE INDEX IF NOT EXISTS idx_reputation_log_node ON reputation_log(node_id);
 CREATE INDEX IF NOT EXISTS idx_node_tokens_hash ON node_tokens(token_hash);
 CREATE INDEX IF NOT EXISTS idx_node_tokens_node ON node_tokens(used_by_node_id);
+CREATE INDEX IF NOT EXISTS idx_economic_periods_month ON economic_periods(month);
+CREATE INDEX IF NOT EXISTS idx_node_earnings_node_amount ON node_earnings(node_id, amount);
+"""
+
+# Connection tuning applied on every connect: WAL lets readers run alongside
+# the writer and synchronous=NORMAL avoids an fsync per commit under WAL
+PRAGMAS = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+PRAGMA cache_size = -65536;
+PRAGMA mmap_size = 268435456;
+PRAGMA busy_timeout = 5000;
+"""
+
+# sqlite3 keeps compiled statements in a per-connection LRU keyed by SQL text
+STATEMENT_CACHE_SIZE = 256
+
+# Rows fetched per round trip to the connection thread when streaming
+ITER_CHUNK_SIZE = 256
+
+# How often the WAL file is checkpointed and truncated in the background
+WAL_CHECKPOINT_INTERVAL_SECONDS = 60
+
+# Network stats are polled by every open dashboard; a short TTL collapses
+# those polls into one aggregate query
+STATS_CACHE_TTL_SECONDS = 1.0
+
+# Statements are module constants so every call site passes identical SQL text
+# and hits the statement cache instead of being re-parsed
+SQL_INSERT_USER = """
+    INSERT INTO users (id, email, password_hash, public_key)
+    VALUES (?, ?, ?, ?)
+    RETURNING *
+"""
+SQL_GET_USER_BY_ID = "SELECT * FROM users WHERE id = ?"
+SQL_GET_USER_BY_EMAIL = "SELECT * FROM users WHERE email = ?"
+SQL_UPDATE_USER_PUBLIC_KEY = "UPDATE users SET public_key = ? WHERE id = ?"
+SQL_INSERT_NODE = """
+    INSERT INTO nodes (
+        id, owner_id, public_key, model_name, max_context, vram_gb,
+        lmstudio_port, last_seen_at, gpu_name, model_params,
+        model_quantization, tokens_per_second, node_tier, supports_vision
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        public_key = excluded.public_key,
+        model_name = excluded.model_name,
+        max_context = excluded.max_context,
+        vram_gb = excluded.vram_gb,
+        lmstudio_port = excluded.lmstudio_port,
+        last_seen_at = excluded.last_seen_at,
+        gpu_name = excluded.gpu_name,
+        model_params = excluded.model_params,
+        model_quantization = excluded.model_quantization,
+        tokens_per_second = excluded.tokens_per_second,
+        node_tier = excluded.node_tier,
+        supports_vision = excluded.supports_vision
+    RETURNING *
+"""
+SQL_GET_NODE_BY_ID = "SELECT * FROM nodes WHERE id = ?"
+SQL_GET_NODES_BY_OWNER = "SELECT * FROM nodes WHERE owner_id = ?"
+SQL_GET_ALL_NODES = "SELECT * FROM nodes ORDER BY reputation DESC"
+SQL_GET_TOP_NODES = """
+    SELECT id, model_name, reputation, total_tasks_completed
+    FROM nodes
+    ORDER BY reputation DESC
+    LIMIT ?
+"""
+# Window SUM gives every row the pool-wide total from the same snapshot,
+# so shares can be computed in one pass over the rows
+SQL_GET_ELIGIBLE_NODES = """
+    SELECT id, model_name, reputation,
+           SUM(reputation) OVER () AS total_reputation
+    FROM nodes
+    WHERE reputation > 0
+    ORDER BY reputation DESC
+"""
+SQL_UPDATE_NODE_LAST_SEEN = (
+    "UPDATE nodes SET last_seen_at = CURRENT_TIMESTAMP WHERE id = ?"
+)
+SQL_UPDATE_NODE_REPUTATION = "UPDATE nodes SET reputation = ? WHERE id = ?"
+SQL_INCREMENT_NODE_TASKS = (
+    "UPDATE nodes SET total_tasks_completed = total_tasks_completed + 1 WHERE id = ?"
+)
+SQL_UPDATE_NODE_CAPABILITIES = (
+    "UPDATE nodes SET tokens_per_second = ?, node_tier = ? WHERE id = ?"
+)
+SQL_UPDATE_NODE_TOKENS_PER_SECOND = "UPDATE nodes SET tokens_per_second = ? WHERE id = ?"
+SQL_UPDATE_NODE_TIER = "UPDATE nodes SET node_tier = ? WHERE id = ?"
+SQL_GET_NODES_BY_TIER = (
+    "SELECT * FROM nodes WHERE node_tier = ? ORDER BY reputation DESC"
+)
+SQL_GET_VISION_CAPABLE_NODES = (
+    "SELECT * FROM nodes WHERE supports_vision = 1 ORDER BY reputation DESC"
+)
+SQL_INSERT_TASK = """
+    INSERT INTO tasks (id, user_id, mode, difficulty, original_prompt, encrypted_prompt, has_files)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    RETURNING *
+"""
+SQL_GET_TASK_BY_ID = "SELECT * FROM tasks WHERE id = ?"
+SQL_GET_TASKS_BY_USER = (
+    "SELECT * FROM tasks WHERE user_id = ? ORDER BY created_at DESC LIMIT ?"
+)
+SQL_COMPLETE_TASK = """
+    UPDATE tasks
+    SET status = ?, final_response = ?, completed_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+SQL_UPDATE_TASK_STATUS = "UPDATE tasks SET status = ? WHERE id = ?"
+SQL_GET_RECENT_TASKS = "SELECT * FROM tasks ORDER BY created_at DESC LIMIT ?"
+SQL_INSERT_SUBTASK = """
+    INSERT INTO subtasks (id, task_id, prompt, encrypted_prompt)
+    VALUES (?, ?, ?, ?)
+"""
+# executemany() rejects statements that return rows, so keep both forms
+SQL_INSERT_SUBTASK_RETURNING = """
+    INSERT INTO subtasks (id, task_id, prompt, encrypted_prompt)
+    VALUES (?, ?, ?, ?)
+    RETURNING *
+"""
+SQL_GET_SUBTASK_BY_ID = "SELECT * FROM subtasks WHERE id = ?"
+# rowid order is insertion order, so subtasks come back in prompt order
+SQL_GET_SUBTASKS_BY_TASK = (
+    "SELECT * FROM subtasks WHERE task_id = ? ORDER BY rowid"
+)
+# Served entirely from idx_subtasks_task_status
+SQL_GET_SUBTASK_COUNTS = """
+    SELECT COUNT(*) AS total,
+           COUNT(*) FILTER (WHERE status = 'completed') AS completed
+    FROM subtasks
+    WHERE task_id = ?
+"""
+# Task row plus its subtask counts, so status polls are one round-trip
+SQL_GET_TASK_WITH_SUBTASK_COUNTS = """
+    SELECT t.*,
+           (SELECT COUNT(*) FROM subtasks s
+            WHERE s.task_id = t.id) AS subtasks_total,
+           (SELECT COUNT(*) FROM subtasks s
+            WHERE s.task_id = t.id AND s.status = 'completed') AS subtasks_completed
+    FROM tasks t
+    WHERE t.id = ?
+"""
+SQL_ASSIGN_SUBTASK = """
+    UPDATE subtasks
+    SET node_id = ?, encrypted_prompt = ?, status = 'assigned',
+        assigned_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+SQL_COMPLETE_SUBTASK = """
+    UPDATE subtasks
+    SET response = ?, encrypted_response = ?, status = 'completed',
+        completed_at = CURRENT_TIMESTAMP, execution_time_ms = ?
+    WHERE id = ?
+"""
+SQL_FAIL_SUBTASK = (
+    "UPDATE subtasks SET status = ?, completed_at = CURRENT_TIMESTAMP WHERE id = ?"
+)
+SQL_INSERT_REPUTATION_LOG = """
+    INSERT INTO reputation_log (node_id, change, reason)
+    VALUES (?, ?, ?)
+"""
+SQL_GET_REPUTATION_HISTORY = """
+    SELECT * FROM reputation_log
+    WHERE node_id = ?
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+SQL_INSERT_ECONOMIC_PERIOD = """
+    INSERT INTO economic_periods (id, month, total_pool)
+    VALUES (?, ?, ?)
+    RETURNING *
+"""
+SQL_GET_ECONOMIC_PERIOD_BY_MONTH = "SELECT * FROM economic_periods WHERE month = ?"
+SQL_INSERT_NODE_EARNING = """
+    INSERT INTO node_earnings (period_id, node_id, reputation_snapshot, share_percentage, amount)
+    VALUES (?, ?, ?, ?, ?)
+"""
+SQL_MARK_PERIOD_DISTRIBUTED = (
+    "UPDATE economic_periods SET distributed = 1, distributed_at = CURRENT_TIMESTAMP "
+    "WHERE id = ?"
+)
+SQL_GET_NODE_EARNINGS = """
+    SELECT ne.*, ep.month
+    FROM node_earnings ne
+    JOIN economic_periods ep ON ne.period_id = ep.id
+    WHERE ne.node_id = ?
+    ORDER BY ep.month DESC
+    LIMIT ?
+"""
+SQL_GET_TOTAL_EARNINGS = (
+    "SELECT SUM(amount) AS total FROM node_earnings WHERE node_id = ?"
+)
+SQL_GET_PERIOD_EARNINGS_SUMMARY = """
+    SELECT COUNT(*) AS nodes, SUM(amount) AS distributed
+    FROM node_earnings
+    WHERE period_id = ?
+"""
+SQL_INSERT_ACCOUNT = """
+    INSERT INTO accounts (id, account_key_hash, account_key_prefix)
+    VALUES (?, ?, ?)
+    RETURNING *
+"""
+SQL_GET_ACCOUNT_BY_ID = "SELECT * FROM accounts WHERE id = ?"
+SQL_GET_ACCOUNT_BY_KEY_HASH = "SELECT * FROM accounts WHERE account_key_hash = ?"
+SQL_GET_ACCOUNT_NODES = (
+    "SELECT * FROM nodes WHERE account_id = ? ORDER BY created_at DESC"
+)
+SQL_GET_ACCOUNT_NODE_COUNT = "SELECT node_count FROM accounts WHERE id = ?"
+SQL_UPDATE_ACCOUNT_STATUS = "UPDATE accounts SET status = ? WHERE id = ?"
+SQL_UPDATE_ACCOUNT_ACTIVITY = (
+    "UPDATE accounts SET last_activity_at = CURRENT_TIMESTAMP WHERE id = ?"
+)
+SQL_UPDATE_ACCOUNT_EARNINGS = (
+    "UPDATE accounts SET total_earnings = total_earnings + ? WHERE id = ?"
+)
+SQL_GET_ALL_ACCOUNTS = "SELECT * FROM accounts ORDER BY created_at DESC"
+SQL_LINK_NODE_TO_ACCOUNT = "UPDATE nodes SET account_id = ? WHERE id = ?"
+SQL_GET_NODE_TOKEN = "SELECT * FROM node_tokens WHERE id = ?"
+SQL_GET_NODE_TOKEN_BY_HASH = (
+    "SELECT * FROM node_tokens WHERE id = ? AND token_hash = ?"
+)
+SQL_GET_NODE_TOKEN_BY_NODE = "SELECT id FROM node_tokens WHERE used_by_node_id = ?"
+# Flags as parameters keep one statement for every filter combination
+SQL_GET_NODE_TOKENS = """
+    SELECT * FROM node_tokens
+    WHERE (? OR used_at IS NULL) AND (? OR revoked = 0)
+    ORDER BY created_at DESC
+"""
+SQL_GET_STATS = """
+    SELECT
+        (SELECT COUNT(*) FROM users) AS total_users,
+        (SELECT COUNT(*) FROM nodes) AS total_nodes,
+        (SELECT COUNT(*) FROM tasks WHERE created_at >= DATE('now')) AS tasks_today,
+        (SELECT COUNT(*) FROM tasks) AS total_tasks
 """
 
 # Migration queries for existing databases
+# Columns added after the initial schema, as (table, column, definition).
+# Each is only ALTERed in when PRAGMA table_info shows it is missing.
+COLUMN_MIGRATIONS = [
+    # Extended node capabilities
+    ("nodes", "gpu_name", "TEXT DEFAULT 'Unknown'"),
+    ("nodes", "model_params", "REAL DEFAULT 7.0"),
+    ("nodes", "model_quantization", "TEXT DEFAULT 'Q4'"),
+    ("nodes", "tokens_per_second", "REAL DEFAULT 0.0"),
+    ("nodes", "node_tier", "TEXT DEFAULT 'basic'"),
+    # Task difficulty
+    ("tasks", "difficulty", "TEXT DEFAULT 'simple'"),
+    # Link nodes to accounts
+    ("nodes", "account_id", "TEXT REFERENCES accounts(id)"),
+    # Multimodal support
+    ("tasks", "has_files", "BOOLEAN DEFAULT FALSE"),
+    ("nodes", "supports_vision", "BOOLEAN DEFAULT FALSE"),
+    # Per-account node counts maintained by triggers instead of COUNT(*)
+    ("accounts", "node_count", "INTEGER DEFAULT 0"),
+]
+
+# Backfills to run for existing rows right after a column is added
+COLUMN_BACKFILLS = {
+    ("accounts", "node_count"): """UPDATE accounts SET node_count = (
+        SELECT COUNT(*) FROM nodes WHERE nodes.account_id = accounts.id
+    )""",
+}
+
+# Idempotent migrations (IF [NOT] EXISTS), safe to run on every startup
 MIGRATIONS = [
-    # Add extended node capabilities columns
-    "ALTER TABLE nodes ADD COLUMN gpu_name TEXT DEFAULT 'Unknown'",
-    "ALTER TABLE nodes ADD COLUMN model_params REAL DEFAULT 7.0",
-    "ALTER TABLE nodes ADD COLUMN model_quantization TEXT DEFAULT 'Q4'",
-    "ALTER TABLE nodes ADD COLUMN tokens_per_second REAL DEFAULT 0.0",
-    "ALTER TABLE nodes ADD COLUMN node_tier TEXT DEFAULT 'basic'",
-    # Add difficulty column to tasks
-    "ALTER TABLE tasks ADD COLUMN difficulty TEXT DEFAULT 'simple'",
-    # Add indexes for new columns (after columns exist)
+    # Indexes for added columns (after columns exist)
     "CREATE INDEX IF NOT EXISTS idx_tasks_difficulty ON tasks(difficulty)",
-    "CREATE INDEX IF NOT EXISTS idx_nodes_tier ON nodes(node_tier)",
     # Add node_tokens table for enrollment system
     """CREATE TABLE IF NOT EXISTS node_tokens (
         id TEXT PRIMARY KEY,
@@ -189,60 +450,322 @@ MIGRATIONS = [
     )""",
     "CREATE INDEX IF NOT EXISTS idx_accounts_key_hash ON accounts(account_key_hash)",
     "CREATE INDEX IF NOT EXISTS idx_accounts_prefix ON accounts(account_key_prefix)",
-    # Add account_id to nodes table
-    "ALTER TABLE nodes ADD COLUMN account_id TEXT REFERENCES accounts(id)",
     "CREATE INDEX IF NOT EXISTS idx_nodes_account ON nodes(account_id)",
-    # Add has_files column to tasks for multimodal support
-    "ALTER TABLE tasks ADD COLUMN has_files BOOLEAN DEFAULT FALSE",
-    # Add supports_vision column to nodes for multimodal models
-    "ALTER TABLE nodes ADD COLUMN supports_vision BOOLEAN DEFAULT FALSE",
+    # Keep accounts.node_count in sync with nodes.account_id
+    """CREATE TRIGGER IF NOT EXISTS trg_nodes_account_insert
+    AFTER INSERT ON nodes
+    WHEN NEW.account_id IS NOT NULL
+    BEGIN
+        UPDATE accounts SET node_count = node_count + 1 WHERE id = NEW.account_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_nodes_account_delete
+    AFTER DELETE ON nodes
+    WHEN OLD.account_id IS NOT NULL
+    BEGIN
+        UPDATE accounts SET node_count = node_count - 1 WHERE id = OLD.account_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_nodes_account_update
+    AFTER UPDATE OF account_id ON nodes
+    WHEN OLD.account_id IS NOT NEW.account_id
+    BEGIN
+        UPDATE accounts SET node_count = node_count - 1 WHERE id = OLD.account_id;
+        UPDATE accounts SET node_count = node_count + 1 WHERE id = NEW.account_id;
+    END""",
+    # Range index so tasks_today in get_stats avoids a full scan
+    "CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks(created_at DESC)",
+    # Composite indexes for per-user history and per-task subtask lookups;
+    # they replace the single-column indexes that are now their prefixes
+    "CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON tasks(user_id, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_subtasks_task_status ON subtasks(task_id, status)",
+    "DROP INDEX IF EXISTS idx_tasks_user",
+    "DROP INDEX IF EXISTS idx_subtasks_task",
+    # Let tier and vision lookups walk nodes already in reputation order
+    # instead of sorting; the vision index only holds vision-capable nodes
+    "CREATE INDEX IF NOT EXISTS idx_nodes_tier_rep ON nodes(node_tier, reputation DESC)",
+    """CREATE INDEX IF NOT EXISTS idx_nodes_vision_rep ON nodes(reputation DESC)
+    WHERE supports_vision = 1""",
+    "DROP INDEX IF EXISTS idx_nodes_tier",
+    # Period lookups by month, and per-node earnings; the earnings index
+    # also covers SUM(amount) so lifetime totals never touch the table
+    "CREATE INDEX IF NOT EXISTS idx_economic_periods_month ON economic_periods(month)",
+    "CREATE INDEX IF NOT EXISTS idx_node_earnings_node_amount ON node_earnings(node_id, amount)",
 ]
 
+MIGRATIONS_SCRIPT = "BEGIN;\n" + ";\n".join(MIGRATIONS) + ";\nCOMMIT;"
+
+
+def dict_row_factory(cursor: sqlite3.Cursor, row: tuple) -> dict[str, Any]:
+    """Build rows as plain dicts so callers never need a dict(row) copy."""
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
 
 class Database:
     """Async SQLite database manager."""
 
-    def __init__(self, db_path: str = "data/iris.db"):
+    def __init__(
+        self,
+        db_path: str = "data/iris.db",
+        read_pool_size: int = 8,
+        checkpoint_interval: float = WAL_CHECKPOINT_INTERVAL_SECONDS
+    ):
         self.db_path = Path(db_path)
+        self.read_pool_size = read_pool_size
+        self.checkpoint_interval = checkpoint_interval
         self._connection: Optional[aiosqlite.Connection] = None
+        self._readers: list[aiosqlite.Connection] = []
+        self._read_pool: Optional[asyncio.Queue[aiosqlite.Connection]] = None
+        self._write_lock = asyncio.Lock()
+        self._transaction_task: Optional[asyncio.Task] = None
+        self._pid: Optional[int] = None
+        self._checkpoint_task: Optional[asyncio.Task] = None
+        self._stats_lock = asyncio.Lock()
+        self._stats_cache: Optional[tuple[float, dict[str, Any]]] = None
+
+    async def _open_connection(self) -> aiosqlite.Connection:
+        """Open a connection with the standard row factory and PRAGMAs."""
+        connection = await aiosqlite.connect(
+            self.db_path,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        connection.row_factory = dict_row_factory
+        await connection.executescript(PRAGMAS)
+        return connection
 
     async def connect(self) -> None:
         """Initialize database connection and create tables."""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._connection = await aiosqlite.connect(self.db_path)
-        self._connection.row_factory = aiosqlite.Row
+        self._connection = await self._open_connection()
+        self._pid = os.getpid()
         await self._connection.executescript(SCHEMA)
         await self._connection.commit()
 
         # Run migrations for existing databases
         await self._run_migrations()
 
-        logger.info("database_connected", path=str(self.db_path))
+        # Reader connections are opened after the schema exists. Under WAL
+        # they can run alongside the single writer connection.
+        if self.read_pool_size > 0:
+            self._read_pool = asyncio.Queue()
+            for _ in range(self.read_pool_size):
+                reader = await self._open_connection()
+                self._readers.append(reader)
+                self._read_pool.put_nowait(reader)
+
+        if self.checkpoint_interval > 0:
+            self._checkpoint_task = asyncio.create_task(self._checkpoint_loop())
+
+        logger.info(
+            "database_connected",
+            path=str(self.db_path),
+            read_pool_size=self.read_pool_size
+        )
 
     async def _run_migrations(self) -> None:
         """Run database migrations for schema updates."""
-        for migration in MIGRATIONS:
-            try:
-                await self._connection.execute(migration)
-                await self._connection.commit()
-            except Exception:
-                # Column probably already exists, ignore
-                pass
+        conn = self._connection
+        columns: dict[str, set[str]] = {}
+        for table in {table for table, _, _ in COLUMN_MIGRATIONS}:
+            async with conn.execute(f"PRAGMA table_info({table})") as cursor:
+                columns[table] = {row["name"] for row in await cursor.fetchall()}
+
+        for table, column, definition in COLUMN_MIGRATIONS:
+            if column in columns[table]:
+                continue
+            await conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            backfill = COLUMN_BACKFILLS.get((table, column))
+            if backfill:
+                await conn.execute(backfill)
+            logger.info("column_added", table=table, column=column)
+
+        await conn.commit()
+
+        # Idempotent statements go to SQLite as one script in one transaction
+        await conn.executescript(MIGRATIONS_SCRIPT)
+
+    async def _checkpoint_loop(self) -> None:
+        """
+        Periodically checkpoint and truncate the WAL file.
+
+        Runs on its own connection so the writer never waits on it, and keeps
+        the -wal file from growing without bound under write bursts.
+        """
+        conn = await self._open_connection()
+        try:
+            while True:
+                await asyncio.sleep(self.checkpoint_interval)
+                try:
+                    async with conn.execute("PRAGMA wal_checkpoint(TRUNCATE)") as cursor:
+                        row = await cursor.fetchone()
+                    if row["busy"]:
+                        logger.debug("wal_checkpoint_busy", frames=row["log"])
+                except sqlite3.Error as e:
+                    logger.warning("wal_checkpoint_failed", error=str(e))
+        finally:
+            await conn.close()
 
     async def disconnect(self) -> None:
         """Close database connection."""
+        if self._checkpoint_task:
+            self._checkpoint_task.cancel()
+            try:
+                await self._checkpoint_task
+            except asyncio.CancelledError:
+                pass
+            self._checkpoint_task = None
+
+        for reader in self._readers:
+            await reader.close()
+        self._readers = []
+        self._read_pool = None
+
         if self._connection:
+            # Refresh planner statistics for tables whose shape has changed
+            await self._connection.execute("PRAGMA optimize")
             await self._connection.close()
             self._connection = None
             logger.info("database_disconnected")
 
+    def _check_connected(self) -> None:
+        """Refuse to use connections that are closed or owned by another process."""
+        if not self._connection:
+            raise RuntimeError("Database not connected")
+        if self._pid != os.getpid():
+            # SQLite handles must not be shared across fork(); each worker
+            # process has to call connect() itself.
+            raise RuntimeError("Database connected in another process")
+
     @property
     def conn(self) -> aiosqlite.Connection:
         """Get the database connection."""
-        if not self._connection:
-            raise RuntimeError("Database not connected")
+        self._check_connected()
         return self._connection
 
+    def _in_transaction(self) -> bool:
+        """Whether the running task is inside its own transaction() block."""
+        return (
+            self._transaction_task is not None
+            and asyncio.current_task() is self._transaction_task
+        )
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection from the pool."""
+        self._check_connected()
+        if self._read_pool is None or self._in_transaction():
+            # No pool (read_pool_size=0) shares the writer connection; inside
+            # a transaction reads also go through it to see their own writes
+            yield self._connection
+            return
+
+        reader = await self._read_pool.get()
+        try:
+            yield reader
+        finally:
+            self._read_pool.put_nowait(reader)
+
+    @asynccontextmanager
+    async def writer(self, commit: bool = True) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Hold the writer connection for one write.
+
+        Writes are serialized on a single lock and committed (or rolled back)
+        on exit. Inside transaction() the write joins the open transaction
+        instead and is committed with it.
+        """
+        if self._in_transaction():
+            yield self.conn
+            return
+        if not commit:
+            raise RuntimeError("_commit=False is only valid inside db.transaction()")
+
+        async with self._write_lock:
+            conn = self.conn
+            try:
+                yield conn
+            except BaseException:
+                await conn.rollback()
+                raise
+            else:
+                await conn.commit()
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """
+        Group several writes into a single commit.
+
+        Holds the write lock for the whole block, so writes from other tasks
+        wait until it commits or rolls back. Write methods called inside the
+        block join it; everything is committed together on exit or rolled
+        back on error.
+
+        Usage:
+            async with db.transaction():
+                await db.update_node_reputation(node_id, rep, _commit=False)
+                await db.log_reputation_change(node_id, change, reason, _commit=False)
+        """
+        if self._in_transaction():
+            yield
+            return
+
+        async with self._write_lock:
+            self._transaction_task = asyncio.current_task()
+            try:
+                yield
+            except BaseException:
+                await self.conn.rollback()
+                raise
+            else:
+                await self.conn.commit()
+            finally:
+                self._transaction_task = None
+
+    async def _insert_returning(
+        self,
+        sql: str,
+        params: tuple
+    ) -> dict[str, Any]:
+        """Run an INSERT ... RETURNING * on the writer and return the row."""
+        async with self.writer() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchone()
+
+    async def _fetchone(
+        self,
+        sql: str,
+        params: tuple = ()
+    ) -> Optional[dict[str, Any]]:
+        """Run a read query on a pooled connection and return one row."""
+        async with self._reader() as reader:
+            async with reader.execute(sql, params) as cursor:
+                return await cursor.fetchone()
+
+    async def _fetchall(
+        self,
+        sql: str,
+        params: tuple = ()
+    ) -> list[dict[str, Any]]:
+        """Run a read query on a pooled connection and return all rows."""
+        async with self._reader() as reader:
+            async with reader.execute(sql, params) as cursor:
+                return await cursor.fetchall()
+
+    async def _iterate(
+        self,
+        sql: str,
+        params: tuple = ()
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Stream rows of a read query from a pooled connection.
+
+        Rows are fetched in chunks of ITER_CHUNK_SIZE, so memory stays flat
+        regardless of how large the result set is.
+        """
+        async with self._reader() as reader:
+            async with reader.execute(sql, params) as cursor:
+                cursor.iter_chunk_size = ITER_CHUNK_SIZE
+                async for row in cursor:
+                    yield row
+
     # =========================================================================
     # User Operations
     # =========================================================================
@@ -255,39 +778,28 @@ class Database:
         public_key: Optional[str] = None
     ) -> dict[str, Any]:
         """Create a new user."""
-        await self.conn.execute(
-            """
-            INSERT INTO users (id, email, password_hash, public_key)
-            VALUES (?, ?, ?, ?)
-            """,
+        return await self._insert_returning(
+            SQL_INSERT_USER,
             (id, email, password_hash, public_key)
         )
-        await self.conn.commit()
-        return await self.get_user_by_id(id)
 
     async def get_user_by_id(self, user_id: str) -> Optional[dict[str, Any]]:
         """Get user by ID."""
-        async with self.conn.execute(
-            "SELECT * FROM users WHERE id = ?", (user_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        return await self._fetchone(SQL_GET_USER_BY_ID, (user_id,))
 
     async def get_user_by_email(self, email: str) -> Optional[dict[str, Any]]:
         """Get user by email."""
-        async with self.conn.execute(
-            "SELECT * FROM users WHERE email = ?", (email,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        return await self._fetchone(SQL_GET_USER_BY_EMAIL, (email,))
 
-    async def update_user_public_key(self, user_id: str, public_key: str) -> None:
+    async def update_user_public_key(
+        self,
+        user_id: str,
+        public_key: str,
+        _commit: bool = True
+    ) -> None:
         """Update user's public key."""
-        await self.conn.execute(
-            "UPDATE users SET public_key = ? WHERE id = ?",
-            (public_key, user_id)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(SQL_UPDATE_USER_PUBLIC_KEY, (public_key, user_id))
 
     # =========================================================================
     # Node Operations
@@ -310,125 +822,88 @@ class Database:
         supports_vision: bool = False
     ) -> dict[str, Any]:
         """Create or update a node."""
-        await self.conn.execute(
-            """
-            INSERT INTO nodes (
-                id, owner_id, public_key, model_name, max_context, vram_gb,
-                lmstudio_port, last_seen_at, gpu_name, model_params,
-                model_quantization, tokens_per_second, node_tier, supports_vision
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(id) DO UPDATE SET
-                public_key = excluded.public_key,
-                model_name = excluded.model_name,
-                max_context = excluded.max_context,
-                vram_gb = excluded.vram_gb,
-                lmstudio_port = excluded.lmstudio_port,
-                last_seen_at = excluded.last_seen_at,
-                gpu_name = excluded.gpu_name,
-                model_params = excluded.model_params,
-                model_quantization = excluded.model_quantization,
-                tokens_per_second = excluded.tokens_per_second,
-                node_tier = excluded.node_tier,
-                supports_vision = excluded.supports_vision
-            """,
+        return await self._insert_returning(
+            SQL_INSERT_NODE,
             (id, owner_id, public_key, model_name, max_context, vram_gb,
-             lmstudio_port, datetime.utcnow(), gpu_name, model_params,
+             lmstudio_port, gpu_name, model_params,
              model_quantization, tokens_per_second, node_tier, supports_vision)
         )
-        await self.conn.commit()
-        return await self.get_node_by_id(id)
 
     async def get_node_by_id(self, node_id: str) -> Optional[dict[str, Any]]:
         """Get node by ID."""
-        async with self.conn.execute(
-            "SELECT * FROM nodes WHERE id = ?", (node_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        return await self._fetchone(SQL_GET_NODE_BY_ID, (node_id,))
 
     async def get_nodes_by_owner(self, owner_id: str) -> list[dict[str, Any]]:
         """Get all nodes owned by a user."""
-        async with self.conn.execute(
-            "SELECT * FROM nodes WHERE owner_id = ?", (owner_id,)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await self._fetchall(SQL_GET_NODES_BY_OWNER, (owner_id,))
 
     async def get_all_nodes(self) -> list[dict[str, Any]]:
         """Get all registered nodes."""
-        async with self.conn.execute(
-            "SELECT * FROM nodes ORDER BY reputation DESC"
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await self._fetchall(SQL_GET_ALL_NODES)
+
+    async def get_top_nodes(self, limit: int = 20) -> list[dict[str, Any]]:
+        """Get the leaderboard columns of the highest-reputation nodes."""
+        return await self._fetchall(SQL_GET_TOP_NODES, (limit,))
+
+    def iter_eligible_nodes(self) -> AsyncIterator[dict[str, Any]]:
+        """
+        Stream nodes with positive reputation, highest first.
 
-    async def update_node_last_seen(self, node_id: str) -> None:
+        Each row has id, model_name, reputation and total_reputation (the
+        sum over all eligible nodes).
+        """
+        return self._iterate(SQL_GET_ELIGIBLE_NODES)
+
+    async def update_node_last_seen(self, node_id: str, _commit: bool = True) -> None:
         """Update node's last seen timestamp."""
-        await self.conn.execute(
-            "UPDATE nodes SET last_seen_at = ? WHERE id = ?",
-            (datetime.utcnow(), node_id)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(SQL_UPDATE_NODE_LAST_SEEN, (node_id,))
 
-    async def update_node_reputation(self, node_id: str, reputation: float) -> None:
+    async def update_node_reputation(
+        self,
+        node_id: str,
+        reputation: float,
+        _commit: bool = True
+    ) -> None:
         """Update node's reputation score."""
-        await self.conn.execute(
-            "UPDATE nodes SET reputation = ? WHERE id = ?",
-            (reputation, node_id)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(SQL_UPDATE_NODE_REPUTATION, (reputation, node_id))
 
-    async def increment_node_tasks(self, node_id: str) -> None:
+    async def increment_node_tasks(self, node_id: str, _commit: bool = True) -> None:
         """Increment node's completed task count."""
-        await self.conn.execute(
-            "UPDATE nodes SET total_tasks_completed = total_tasks_completed + 1 WHERE id = ?",
-            (node_id,)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(SQL_INCREMENT_NODE_TASKS, (node_id,))
 
     async def update_node_capabilities(
         self,
         node_id: str,
         tokens_per_second: Optional[float] = None,
-        node_tier: Optional[str] = None
+        node_tier: Optional[str] = None,
+        _commit: bool = True
     ) -> None:
         """Update node's extended capabilities."""
-        updates = []
-        params = []
-
-        if tokens_per_second is not None:
-            updates.append("tokens_per_second = ?")
-            params.append(tokens_per_second)
-
-        if node_tier is not None:
-            updates.append("node_tier = ?")
-            params.append(node_tier)
-
-        if updates:
-            params.append(node_id)
-            await self.conn.execute(
-                f"UPDATE nodes SET {', '.join(updates)} WHERE id = ?",
-                tuple(params)
-            )
-            await self.conn.commit()
+        if tokens_per_second is not None and node_tier is not None:
+            sql = SQL_UPDATE_NODE_CAPABILITIES
+            params = (tokens_per_second, node_tier, node_id)
+        elif tokens_per_second is not None:
+            sql = SQL_UPDATE_NODE_TOKENS_PER_SECOND
+            params = (tokens_per_second, node_id)
+        elif node_tier is not None:
+            sql = SQL_UPDATE_NODE_TIER
+            params = (node_tier, node_id)
+        else:
+            return
+
+        async with self.writer(_commit) as conn:
+            await conn.execute(sql, params)
 
     async def get_nodes_by_tier(self, tier: str) -> list[dict[str, Any]]:
         """Get all nodes of a specific tier."""
-        async with self.conn.execute(
-            "SELECT * FROM nodes WHERE node_tier = ? ORDER BY reputation DESC",
-            (tier,)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await self._fetchall(SQL_GET_NODES_BY_TIER, (tier,))
 
     async def get_vision_capable_nodes(self) -> list[dict[str, Any]]:
         """Get all nodes that support vision/image processing."""
-        async with self.conn.execute(
-            "SELECT * FROM nodes WHERE supports_vision = TRUE ORDER BY reputation DESC"
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await self._fetchall(SQL_GET_VISION_CAPABLE_NODES)
 
     # =========================================================================
     # Task Operations
@@ -445,23 +920,14 @@ class Database:
         has_files: bool = False
     ) -> dict[str, Any]:
         """Create a new task."""
-        await self.conn.execute(
-            """
-            INSERT INTO tasks (id, user_id, mode, difficulty, original_prompt, encrypted_prompt, has_files)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
+        return await self._insert_returning(
+            SQL_INSERT_TASK,
             (id, user_id, mode, difficulty, original_prompt, encrypted_prompt, has_files)
         )
-        await self.conn.commit()
-        return await self.get_task_by_id(id)
 
     async def get_task_by_id(self, task_id: str) -> Optional[dict[str, Any]]:
         """Get task by ID."""
-        async with self.conn.execute(
-            "SELECT * FROM tasks WHERE id = ?", (task_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        return await self._fetchone(SQL_GET_TASK_BY_ID, (task_id,))
 
     async def get_tasks_by_user(
         self,
@@ -469,44 +935,28 @@ class Database:
         limit: int = 100
     ) -> list[dict[str, Any]]:
         """Get tasks for a user."""
-        async with self.conn.execute(
-            "SELECT * FROM tasks WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
-            (user_id, limit)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await self._fetchall(SQL_GET_TASKS_BY_USER, (user_id, limit))
 
     async def update_task_status(
         self,
         task_id: str,
         status: str,
-        final_response: Optional[str] = None
+        final_response: Optional[str] = None,
+        _commit: bool = True
     ) -> None:
         """Update task status and optionally set response."""
-        if final_response is not None:
-            await self.conn.execute(
-                """
-                UPDATE tasks
-                SET status = ?, final_response = ?, completed_at = ?
-                WHERE id = ?
-                """,
-                (status, final_response, datetime.utcnow(), task_id)
-            )
-        else:
-            await self.conn.execute(
-                "UPDATE tasks SET status = ? WHERE id = ?",
-                (status, task_id)
-            )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            if final_response is not None:
+                await conn.execute(
+                    SQL_COMPLETE_TASK,
+                    (status, final_response, task_id)
+                )
+            else:
+                await conn.execute(SQL_UPDATE_TASK_STATUS, (status, task_id))
 
     async def get_recent_tasks(self, limit: int = 10) -> list[dict[str, Any]]:
         """Get most recent tasks across all users."""
-        async with self.conn.execute(
-            "SELECT * FROM tasks ORDER BY created_at DESC LIMIT ?",
-            (limit,)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await self._fetchall(SQL_GET_RECENT_TASKS, (limit,))
 
     # =========================================================================
     # Subtask Operations
@@ -520,70 +970,88 @@ class Database:
         encrypted_prompt: Optional[str] = None
     ) -> dict[str, Any]:
         """Create a new subtask."""
-        await self.conn.execute(
-            """
-            INSERT INTO subtasks (id, task_id, prompt, encrypted_prompt)
-            VALUES (?, ?, ?, ?)
-            """,
+        return await self._insert_returning(
+            SQL_INSERT_SUBTASK_RETURNING,
             (id, task_id, prompt, encrypted_prompt)
         )
-        await self.conn.commit()
-        return await self.get_subtask_by_id(id)
+
+    async def create_subtasks_bulk(
+        self,
+        rows: list[tuple[str, str, str, Optional[str]]],
+        _commit: bool = True
+    ) -> None:
+        """
+        Create many subtasks with a single commit.
+
+        Args:
+            rows: (id, task_id, prompt, encrypted_prompt) tuples
+        """
+        async with self.writer(_commit) as conn:
+            await conn.executemany(SQL_INSERT_SUBTASK, rows)
 
     async def get_subtask_by_id(self, subtask_id: str) -> Optional[dict[str, Any]]:
         """Get subtask by ID."""
-        async with self.conn.execute(
-            "SELECT * FROM subtasks WHERE id = ?", (subtask_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        return await self._fetchone(SQL_GET_SUBTASK_BY_ID, (subtask_id,))
 
     async def get_subtasks_by_task(self, task_id: str) -> list[dict[str, Any]]:
         """Get all subtasks for a task."""
-        async with self.conn.execute(
-            "SELECT * FROM subtasks WHERE task_id = ?", (task_id,)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await self._fetchall(SQL_GET_SUBTASKS_BY_TASK, (task_id,))
 
-    async def assign_subtask(self, subtask_id: str, node_id: str, encrypted_prompt: str) -> None:
+    async def get_subtask_counts(self, task_id: str) -> tuple[int, int]:
+        """Get (completed, total) subtask counts for a task."""
+        row = await self._fetchone(SQL_GET_SUBTASK_COUNTS, (task_id,))
+        return row["completed"], row["total"]
+
+    async def get_task_with_subtask_counts(
+        self,
+        task_id: str
+    ) -> Optional[tuple[dict[str, Any], int, int]]:
+        """Get (task, completed, total) in one query, or None if not found."""
+        row = await self._fetchone(SQL_GET_TASK_WITH_SUBTASK_COUNTS, (task_id,))
+        if not row:
+            return None
+        completed = row.pop("subtasks_completed")
+        total = row.pop("subtasks_total")
+        return row, completed, total
+
+    async def assign_subtask(
+        self,
+        subtask_id: str,
+        node_id: str,
+        encrypted_prompt: str,
+        _commit: bool = True
+    ) -> None:
         """Assign a subtask to a node."""
-        await self.conn.execute(
-            """
-            UPDATE subtasks
-            SET node_id = ?, encrypted_prompt = ?, status = 'assigned', assigned_at = ?
-            WHERE id = ?
-            """,
-            (node_id, encrypted_prompt, datetime.utcnow(), subtask_id)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(
+                SQL_ASSIGN_SUBTASK,
+                (node_id, encrypted_prompt, subtask_id)
+            )
 
     async def complete_subtask(
         self,
         subtask_id: str,
         response: str,
         encrypted_response: str,
-        execution_time_ms: int
+        execution_time_ms: int,
+        _commit: bool = True
     ) -> None:
         """Mark a subtask as completed."""
-        await self.conn.execute(
-            """
-            UPDATE subtasks
-            SET response = ?, encrypted_response = ?, status = 'completed',
-                completed_at = ?, execution_time_ms = ?
-            WHERE id = ?
-            """,
-            (response, encrypted_response, datetime.utcnow(), execution_time_ms, subtask_id)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(
+                SQL_COMPLETE_SUBTASK,
+                (response, encrypted_response, execution_time_ms, subtask_id)
+            )
 
-    async def fail_subtask(self, subtask_id: str, status: str = "failed") -> None:
+    async def fail_subtask(
+        self,
+        subtask_id: str,
+        status: str = "failed",
+        _commit: bool = True
+    ) -> None:
         """Mark a subtask as failed or timeout."""
-        await self.conn.execute(
-            "UPDATE subtasks SET status = ?, completed_at = ? WHERE id = ?",
-            (status, datetime.utcnow(), subtask_id)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(SQL_FAIL_SUBTASK, (status, subtask_id))
 
     # =========================================================================
     # Reputation Log Operations
@@ -593,17 +1061,12 @@ class Database:
         self,
         node_id: str,
         change: float,
-        reason: str
+        reason: str,
+        _commit: bool = True
     ) -> None:
         """Log a reputation change."""
-        await self.conn.execute(
-            """
-            INSERT INTO reputation_log (node_id, change, reason)
-            VALUES (?, ?, ?)
-            """,
-            (node_id, change, reason)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(SQL_INSERT_REPUTATION_LOG, (node_id, change, reason))
 
     async def get_reputation_history(
         self,
@@ -611,17 +1074,7 @@ class Database:
         limit: int = 100
     ) -> list[dict[str, Any]]:
         """Get reputation history for a node."""
-        async with self.conn.execute(
-            """
-            SELECT * FROM reputation_log
-            WHERE node_id = ?
-            ORDER BY created_at DESC
-            LIMIT ?
-            """,
-            (node_id, limit)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await self._fetchall(SQL_GET_REPUTATION_HISTORY, (node_id, limit))
 
     # =========================================================================
     # Economic Operations
@@ -634,27 +1087,14 @@ class Database:
         total_pool: float
     ) -> dict[str, Any]:
         """Create a new economic period."""
-        await self.conn.execute(
-            """
-            INSERT INTO economic_periods (id, month, total_pool)
-            VALUES (?, ?, ?)
-            """,
+        return await self._insert_returning(
+            SQL_INSERT_ECONOMIC_PERIOD,
             (id, month, total_pool)
         )
-        await self.conn.commit()
-        async with self.conn.execute(
-            "SELECT * FROM economic_periods WHERE id = ?", (id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return dict(row)
 
     async def get_economic_period(self, month: str) -> Optional[dict[str, Any]]:
         """Get economic period by month."""
-        async with self.conn.execute(
-            "SELECT * FROM economic_periods WHERE month = ?", (month,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        return await self._fetchone(SQL_GET_ECONOMIC_PERIOD_BY_MONTH, (month,))
 
     async def record_node_earning(
         self,
@@ -662,25 +1102,52 @@ class Database:
         node_id: str,
         reputation_snapshot: float,
         share_percentage: float,
-        amount: float
+        amount: float,
+        _commit: bool = True
     ) -> None:
         """Record earnings for a node in a period."""
-        await self.conn.execute(
-            """
-            INSERT INTO node_earnings (period_id, node_id, reputation_snapshot, share_percentage, amount)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (period_id, node_id, reputation_snapshot, share_percentage, amount)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(
+                SQL_INSERT_NODE_EARNING,
+                (period_id, node_id, reputation_snapshot, share_percentage, amount)
+            )
 
-    async def mark_period_distributed(self, period_id: str) -> None:
+    async def record_node_earnings_bulk(
+        self,
+        rows: list[tuple[str, str, float, float, float]],
+        _commit: bool = True
+    ) -> None:
+        """
+        Record earnings for many nodes with a single commit.
+
+        Args:
+            rows: (period_id, node_id, reputation_snapshot,
+                   share_percentage, amount) tuples
+        """
+        async with self.writer(_commit) as conn:
+            await conn.executemany(SQL_INSERT_NODE_EARNING, rows)
+
+    async def mark_period_distributed(self, period_id: str, _commit: bool = True) -> None:
         """Mark an economic period as distributed."""
-        await self.conn.execute(
-            "UPDATE economic_periods SET distributed = TRUE, distributed_at = ? WHERE id = ?",
-            (datetime.utcnow(), period_id)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(SQL_MARK_PERIOD_DISTRIBUTED, (period_id,))
+
+    async def get_node_earnings(
+        self,
+        node_id: str,
+        limit: int = 12
+    ) -> list[dict[str, Any]]:
+        """Get a node's earnings with their period month, newest first."""
+        return await self._fetchall(SQL_GET_NODE_EARNINGS, (node_id, limit))
+
+    async def get_total_earnings(self, node_id: str) -> float:
+        """Get a node's total lifetime earnings."""
+        row = await self._fetchone(SQL_GET_TOTAL_EARNINGS, (node_id,))
+        return row["total"] or 0.0
+
+    async def get_period_earnings_summary(self, period_id: str) -> dict[str, Any]:
+        """Get the number of nodes paid and the amount paid in a period."""
+        return await self._fetchone(SQL_GET_PERIOD_EARNINGS_SUMMARY, (period_id,))
 
     # =========================================================================
     # Account Operations (Mullvad-style)
@@ -693,120 +1160,116 @@ class Database:
         account_key_prefix: str
     ) -> dict[str, Any]:
         """Create a new account."""
-        await self.conn.execute(
-            """
-            INSERT INTO accounts (id, account_key_hash, account_key_prefix)
-            VALUES (?, ?, ?)
-            """,
+        return await self._insert_returning(
+            SQL_INSERT_ACCOUNT,
             (id, account_key_hash, account_key_prefix)
         )
-        await self.conn.commit()
-        return await self.get_account_by_id(id)
 
     async def get_account_by_id(self, account_id: str) -> Optional[dict[str, Any]]:
         """Get account by ID."""
-        async with self.conn.execute(
-            "SELECT * FROM accounts WHERE id = ?", (account_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        return await self._fetchone(SQL_GET_ACCOUNT_BY_ID, (account_id,))
 
     async def get_account_by_key_hash(self, key_hash: str) -> Optional[dict[str, Any]]:
         """Get account by account key hash."""
-        async with self.conn.execute(
-            "SELECT * FROM accounts WHERE account_key_hash = ?", (key_hash,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        return await self._fetchone(SQL_GET_ACCOUNT_BY_KEY_HASH, (key_hash,))
 
     async def get_account_nodes(self, account_id: str) -> list[dict[str, Any]]:
         """Get all nodes belonging to an account."""
-        async with self.conn.execute(
-            "SELECT * FROM nodes WHERE account_id = ? ORDER BY created_at DESC",
-            (account_id,)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await self._fetchall(SQL_GET_ACCOUNT_NODES, (account_id,))
 
     async def get_account_node_count(self, account_id: str) -> int:
-        """Get count of nodes for an account."""
-        async with self.conn.execute(
-            "SELECT COUNT(*) as count FROM nodes WHERE account_id = ?",
-            (account_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row["count"]
-
-    async def update_account_status(self, account_id: str, status: str) -> None:
+        """Get count of nodes for an account (maintained by triggers)."""
+        row = await self._fetchone(SQL_GET_ACCOUNT_NODE_COUNT, (account_id,))
+        return row["node_count"] if row else 0
+
+    async def update_account_status(
+        self,
+        account_id: str,
+        status: str,
+        _commit: bool = True
+    ) -> None:
         """Update account status."""
-        await self.conn.execute(
-            "UPDATE accounts SET status = ? WHERE id = ?",
-            (status, account_id)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(SQL_UPDATE_ACCOUNT_STATUS, (status, account_id))
 
-    async def update_account_activity(self, account_id: str) -> None:
+    async def update_account_activity(self, account_id: str, _commit: bool = True) -> None:
         """Update account's last activity timestamp."""
-        await self.conn.execute(
-            "UPDATE accounts SET last_activity_at = ? WHERE id = ?",
-            (datetime.utcnow(), account_id)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(SQL_UPDATE_ACCOUNT_ACTIVITY, (account_id,))
 
     async def update_account_earnings(
         self,
         account_id: str,
-        amount: float
+        amount: float,
+        _commit: bool = True
     ) -> None:
         """Add to account's total earnings."""
-        await self.conn.execute(
-            "UPDATE accounts SET total_earnings = total_earnings + ? WHERE id = ?",
-            (amount, account_id)
-        )
-        await self.conn.commit()
+        async with self.writer(_commit) as conn:
+            await conn.execute(SQL_UPDATE_ACCOUNT_EARNINGS, (amount, account_id))
 
     async def get_all_accounts(self) -> list[dict[str, Any]]:
         """Get all accounts."""
-        async with self.conn.execute(
-            "SELECT * FROM accounts ORDER BY created_at DESC"
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await self._fetchall(SQL_GET_ALL_ACCOUNTS)
 
-    async def link_node_to_account(self, node_id: str, account_id: str) -> None:
+    async def link_node_to_account(
+        self,
+        node_id: str,
+        account_id: str,
+        _commit: bool = True
+    ) -> None:
         """Link a node to an account."""
-        await self.conn.execute(
-            "UPDATE nodes SET account_id = ? WHERE id = ?",
-            (account_id, node_id)
+        async with self.writer(_commit) as conn:
+            await conn.execute(SQL_LINK_NODE_TO_ACCOUNT, (account_id, node_id))
+
+    # =========================================================================
+    # Node Token Operations
+    # =========================================================================
+
+    async def get_node_token(
+        self,
+        token_id: str,
+        token_hash: Optional[str] = None
+    ) -> Optional[dict[str, Any]]:
+        """Get an enrollment token by ID, optionally requiring its hash to match."""
+        if token_hash is None:
+            return await self._fetchone(SQL_GET_NODE_TOKEN, (token_id,))
+        return await self._fetchone(SQL_GET_NODE_TOKEN_BY_HASH, (token_id, token_hash))
+
+    async def get_node_token_id_for_node(self, node_id: str) -> Optional[str]:
+        """Get the ID of the token a node enrolled with."""
+        row = await self._fetchone(SQL_GET_NODE_TOKEN_BY_NODE, (node_id,))
+        return row["id"] if row else None
+
+    async def get_node_tokens(
+        self,
+        include_used: bool = True,
+        include_revoked: bool = False
+    ) -> list[dict[str, Any]]:
+        """Get enrollment tokens, newest first."""
+        return await self._fetchall(
+            SQL_GET_NODE_TOKENS,
+            (include_used, include_revoked)
         )
-        await self.conn.commit()
 
     # =========================================================================
     # Statistics
     # =========================================================================
 
     async def get_stats(self) -> dict[str, Any]:
-        """Get overall statistics."""
-        async with self.conn.execute("SELECT COUNT(*) as count FROM users") as cursor:
-            users_count = (await cursor.fetchone())["count"]
-
-        async with self.conn.execute("SELECT COUNT(*) as count FROM nodes") as cursor:
-            nodes_count = (await cursor.fetchone())["count"]
-
-        async with self.conn.execute(
-            "SELECT COUNT(*) as count FROM tasks WHERE DATE(created_at) = DATE('now')"
-        ) as cursor:
-            tasks_today = (await cursor.fetchone())["count"]
-
-        async with self.conn.execute("SELECT COUNT(*) as count FROM tasks") as cursor:
-            total_tasks = (await cursor.fetchone())["count"]
-
-        return {
-            "total_users": users_count,
-            "total_nodes": nodes_count,
-            "tasks_today": tasks_today,
-            "total_tasks": total_tasks
-        }
+        """
+        Get overall statistics in a single round-trip.
+
+        Results are reused for STATS_CACHE_TTL_SECONDS, and concurrent
+        callers wait for one refresh instead of each querying. Callers get
+        their own copy, so they may add keys to it.
+        """
+        async with self._stats_lock:
+            cached = self._stats_cache
+            if cached is None or time.monotonic() >= cached[0]:
+                stats = await self._fetchone(SQL_GET_STATS)
+                cached = (time.monotonic() + STATS_CACHE_TTL_SECONDS, stats)
+                self._stats_cache = cached
+        return dict(cached[1])
 
 
 # Global database instance
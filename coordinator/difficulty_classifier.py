@@ -7,14 +7,24 @@ Classifies tasks using:
 """
 
 import asyncio
+import hashlib
 import os
+import random
 import re
 import httpx
-from typing import Optional, TYPE_CHECKING
+from collections import OrderedDict
+from typing import Hashable, Optional, TYPE_CHECKING
 import structlog
 
 from shared.models import TaskDifficulty
 
+try:
+    # Optional DFA-based engine for the keyword scan (pip install google-re2).
+    # RE2 keeps the same leftmost-first alternation semantics as re.
+    import re2 as keyword_re
+except ImportError:
+    keyword_re = re
+
 if TYPE_CHECKING:
     from .node_registry import NodeRegistry
     from .crypto import CoordinatorCrypto
@@ -26,9 +36,19 @@ OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY", "")
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 OPENROUTER_MODEL = "openai/gpt-5-nano"
 
+# Languages the local keyword classifier matches (comma-separated: en, es)
+CLASSIFIER_LANGUAGES = frozenset(
+    lang.strip()
+    for lang in os.environ.get("IRIS_CLASSIFIER_LANGS", "en,es").split(",")
+    if lang.strip()
+)
+
 # Classification constants
 CLASSIFICATION_TIMEOUT = 10  # seconds
-CLASSIFICATION_PROMPT_TEMPLATE = """Classify the following user request into exactly one difficulty level.
+# Static instructions go in the system message and the request alone in the
+# user message, so every call shares an identical prefix that providers can
+# cache instead of re-reading it
+CLASSIFICATION_SYSTEM_PROMPT = """Classify the user's request into exactly one difficulty level.
 
 SIMPLE (basic questions, quick answers):
 - Definitions: "What is X?"
@@ -55,12 +75,158 @@ ADVANCED (requires technical expertise or multi-step reasoning):
 
 IMPORTANT: If the request mentions creating a script, program, code, algorithm, or any technical implementation, it is ALWAYS ADVANCED.
 
-User request:
+Respond with ONLY one word: SIMPLE, COMPLEX, or ADVANCED"""
+
+CLASSIFICATION_USER_TEMPLATE = """User request:
 \"\"\"
 {prompt}
-\"\"\"
+\"\"\""""
+
+# Characters of the user prompt sent for classification
+CLASSIFICATION_MAX_PROMPT_CHARS = 1000
+
+# Transient API failures are retried within the CLASSIFICATION_TIMEOUT budget
+CLASSIFICATION_MAX_ATTEMPTS = 3
+CLASSIFICATION_RETRY_BASE_DELAY = 0.5  # seconds, doubled per attempt plus jitter
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504, 529})
+
+# Local scores decisive enough to skip the API (see confident_difficulty)
+CONFIDENT_ADVANCED_SCORE = 85
+CONFIDENT_SIMPLE_SCORE = 15
+
+# Maximum number of classifications remembered per classifier (LRU)
+CLASSIFICATION_CACHE_MAX_SIZE = 4096
+
+
+def _classification_text(prompt: str) -> str:
+    """
+    Prompt text sent to the API classifier.
+
+    Whitespace runs are collapsed first so they do not use up the
+    CLASSIFICATION_MAX_PROMPT_CHARS budget, and the cut falls on a word
+    boundary rather than mid-word.
+    """
+    limit = CLASSIFICATION_MAX_PROMPT_CHARS
+    # Bound the split for very long prompts; only the head is ever sent
+    text = ' '.join(prompt[:limit * 4].split())
+    if len(text) > limit:
+        cut = text.rfind(' ', 0, limit + 1)
+        text = text[:cut if cut > 0 else limit]
+    return text
+
+
+def _prompt_digest(prompt: str) -> bytes:
+    """Fixed-size cache key so cached entries never hold whole prompts."""
+    return hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+
+
+def _cache_get(
+    cache: OrderedDict[Hashable, TaskDifficulty],
+    key: Hashable
+) -> Optional[TaskDifficulty]:
+    """Look up a cached classification, marking it recently used."""
+    difficulty = cache.get(key)
+    if difficulty is not None:
+        cache.move_to_end(key)
+    return difficulty
+
+
+def _cache_put(
+    cache: OrderedDict[Hashable, TaskDifficulty],
+    key: Hashable,
+    difficulty: TaskDifficulty
+) -> None:
+    """Store a classification, evicting the least recently used entry."""
+    cache[key] = difficulty
+    cache.move_to_end(key)
+    if len(cache) > CLASSIFICATION_CACHE_MAX_SIZE:
+        cache.popitem(last=False)
+
+
+def _keyword_trie_regex(keywords: list[str]) -> str:
+    """
+    Build a regex alternation for keywords, factored into a prefix trie.
+
+    A flat "a|b|c|..." alternation makes the regex engine try every keyword
+    at every position of the prompt. Factoring shared prefixes means most
+    positions are rejected after a single character comparison. Each
+    optional tail is greedy, so the longest keyword at a position wins,
+    i.e. "markov chain" over "markov".
+    """
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword.lower():
+            node = node.setdefault(char, {})
+        node[""] = {}  # end of a keyword
+
+    def to_regex(node: dict) -> str:
+        branches = [re.escape(char) + to_regex(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return to_regex(trie)
+
+
+def _clamp_score(score: int) -> int:
+    """Clamp a difficulty score to 0-100."""
+    return 0 if score < 0 else 100 if score > 100 else score
+
+
+def _first_distinct(items, limit: int = 3) -> list[str]:
+    """Return up to `limit` distinct items, in order of first appearance."""
+    seen = []
+    for item in items:
+        if item not in seen:
+            seen.append(item)
+            if len(seen) == limit:
+                break
+    return seen
+
+
+def _compile_keyword_pattern(
+    groups: tuple[tuple[str, list[str]], ...],
+    language_keywords: dict[str, frozenset[str]],
+    languages: frozenset[str]
+):
+    """
+    Compile lowercase keyword lists into one pattern.
+
+    Each (category, keywords) pair becomes a named group, in priority order,
+    so a single scan tallies all categories via match.lastgroup. The pattern
+    is case-sensitive and meant to run over an already lowercased prompt. Keywords
+    specific to a language not in `languages` are left out, so single-language
+    deployments scan a smaller pattern.
+    """
+    excluded = frozenset().union(*(
+        keywords for lang, keywords in language_keywords.items()
+        if lang not in languages
+    ))
+    return keyword_re.compile(
+        '|'.join(
+            f"(?P<{category}>"
+            f"{_keyword_trie_regex([kw for kw in keywords if kw not in excluded])})"
+            for category, keywords in groups
+        )
+    )
+
+
+# One-word API answers, in the priority used when a reply mentions several
+_RESPONSE_DIFFICULTIES = {
+    "ADVANCED": TaskDifficulty.ADVANCED,
+    "COMPLEX": TaskDifficulty.COMPLEX,
+    "SIMPLE": TaskDifficulty.SIMPLE,
+}
 
-Respond with ONLY one word: SIMPLE, COMPLEX, or ADVANCED"""
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Seconds requested by a Retry-After header, if given as a number."""
+    try:
+        return max(float(response.headers["retry-after"]), 0.0)
+    except (KeyError, ValueError):
+        return None
 
 
 class OpenRouterClassifier:
@@ -69,8 +235,32 @@ class OpenRouterClassifier:
     Falls back to local keyword-based classification if API fails.
     """
 
-    def __init__(self):
-        self._local_classifier = LocalDifficultyClassifier()
+    def __init__(self, local_classifier: Optional["LocalDifficultyClassifier"] = None):
+        self._local_classifier = local_classifier or LocalDifficultyClassifier()
+        # Successful API classifications, keyed by digest of the text sent
+        self._cache: OrderedDict[bytes, TaskDifficulty] = OrderedDict()
+        # API requests in progress, keyed like the cache
+        self._in_flight: dict[bytes, asyncio.Future[Optional[TaskDifficulty]]] = {}
+        # Pooled HTTP client, so classifications reuse keep-alive connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def connect(self) -> None:
+        """Create the pooled HTTP client."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=CLASSIFICATION_TIMEOUT)
+
+    async def disconnect(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client, created on first use if connect() was not called."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=CLASSIFICATION_TIMEOUT)
+        return self._client
 
     async def classify(
         self,
@@ -98,6 +288,12 @@ class OpenRouterClassifier:
             logger.debug("difficulty_explicit", difficulty=explicit_difficulty.value)
             return explicit_difficulty
 
+        # Obvious cases are settled locally without an API round-trip
+        difficulty = self._local_classifier.confident_difficulty(prompt, subtask_count)
+        if difficulty:
+            logger.debug("classification_shortcircuited", difficulty=difficulty.value)
+            return difficulty
+
         # Try OpenRouter API classification
         try:
             difficulty = await self._classify_via_openrouter(prompt)
@@ -115,7 +311,7 @@ class OpenRouterClassifier:
         prompt: str
     ) -> Optional[TaskDifficulty]:
         """
-        Send classification request to OpenRouter API.
+        Classify via OpenRouter, reusing cached and in-flight results.
 
         Returns:
             TaskDifficulty if successful, None if failed
@@ -125,12 +321,49 @@ class OpenRouterClassifier:
             logger.warning("openrouter_api_key_not_set")
             return None
 
-        # Build classification prompt (limit user prompt to first 1000 chars)
-        classification_prompt = CLASSIFICATION_PROMPT_TEMPLATE.format(
-            prompt=prompt[:1000]
+        # The text sent is the cache key; case does not change how a request
+        # is classified, so near-identical resubmissions share an entry
+        text = _classification_text(prompt)
+        cache_key = _prompt_digest(text.lower())
+        cached = _cache_get(self._cache, cache_key)
+        if cached is not None:
+            logger.debug("openrouter_classification_cached", difficulty=cached.value)
+            return cached
+
+        # Identical prompts arriving while a request is in flight share it
+        pending = self._in_flight.get(cache_key)
+        if pending is not None:
+            logger.debug("openrouter_classification_coalesced")
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future[Optional[TaskDifficulty]] = (
+            asyncio.get_running_loop().create_future()
         )
+        self._in_flight[cache_key] = future
+        difficulty = None
+        try:
+            difficulty = await self._request_classification(text)
+            if difficulty:
+                _cache_put(self._cache, cache_key, difficulty)
+            return difficulty
+        finally:
+            del self._in_flight[cache_key]
+            future.set_result(difficulty)
 
-        logger.info("openrouter_sending_request", model=OPENROUTER_MODEL, prompt_length=len(prompt))
+    async def _request_classification(
+        self,
+        prompt: str
+    ) -> Optional[TaskDifficulty]:
+        """
+        Send one classification request to OpenRouter.
+
+        Returns:
+            TaskDifficulty if successful, None if failed
+        """
+        # Build classification prompt (already trimmed by _classification_text)
+        classification_prompt = CLASSIFICATION_USER_TEMPLATE.format(prompt=prompt)
+
+        logger.debug("openrouter_sending_request", model=OPENROUTER_MODEL, prompt_length=len(prompt))
 
         url = f"{OPENROUTER_BASE_URL}/chat/completions"
         headers = {
@@ -140,6 +373,10 @@ class OpenRouterClassifier:
         payload = {
             "model": OPENROUTER_MODEL,
             "messages": [
+                {
+                    "role": "system",
+                    "content": CLASSIFICATION_SYSTEM_PROMPT
+                },
                 {
                     "role": "user",
                     "content": classification_prompt
@@ -150,58 +387,56 @@ class OpenRouterClassifier:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=CLASSIFICATION_TIMEOUT) as client:
-                response = await client.post(url, headers=headers, json=payload)
+            response = await self._post_with_retries(url, headers, payload)
 
-                logger.info(
-                    "openrouter_response_status",
-                    status_code=response.status_code
+            logger.debug(
+                "openrouter_response_status",
+                status_code=response.status_code
+            )
+
+            if response.status_code != 200:
+                logger.warning(
+                    "openrouter_api_error",
+                    status_code=response.status_code,
+                    response=response.text[:500]
                 )
+                return None
+
+            data = response.json()
+
+            # Log full response structure for debugging. The dict is passed
+            # as is: it is only rendered if the debug line is emitted, and
+            # filter_by_level drops it before that in production
+            logger.debug("openrouter_raw_response", data=data)
 
-                if response.status_code != 200:
+            content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+            # If content is empty, check for error in response
+            if not content:
+                error = data.get("error", {})
+                if error:
                     logger.warning(
-                        "openrouter_api_error",
-                        status_code=response.status_code,
-                        response=response.text[:500]
+                        "openrouter_response_error",
+                        error=str(error)[:200]
                     )
-                    return None
+                return None
 
-                data = response.json()
+            difficulty = self._parse_classification_response(content)
 
-                # Log full response structure for debugging
+            if difficulty:
                 logger.info(
-                    "openrouter_raw_response",
-                    data=str(data)[:500]
+                    "openrouter_classification_success",
+                    difficulty=difficulty.value,
+                    model=OPENROUTER_MODEL,
+                    raw_response=content[:50]
                 )
-
-                content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-
-                # If content is empty, check for error in response
-                if not content:
-                    error = data.get("error", {})
-                    if error:
-                        logger.warning(
-                            "openrouter_response_error",
-                            error=str(error)[:200]
-                        )
-                    return None
-
-                difficulty = self._parse_classification_response(content)
-
-                if difficulty:
-                    logger.info(
-                        "openrouter_classification_success",
-                        difficulty=difficulty.value,
-                        model=OPENROUTER_MODEL,
-                        raw_response=content[:50]
-                    )
-                    return difficulty
-                else:
-                    logger.warning(
-                        "classification_parse_failed",
-                        response=content[:100] if content else "(empty response)"
-                    )
-                    return None
+                return difficulty
+            else:
+                logger.warning(
+                    "classification_parse_failed",
+                    response=content[:100] if content else "(empty response)"
+                )
+                return None
 
         except httpx.TimeoutException:
             logger.warning("openrouter_timeout", timeout=CLASSIFICATION_TIMEOUT)
@@ -210,6 +445,64 @@ class OpenRouterClassifier:
             logger.error("openrouter_request_failed", error=str(e))
             return None
 
+    async def _post_with_retries(
+        self,
+        url: str,
+        headers: dict,
+        payload: dict
+    ) -> httpx.Response:
+        """
+        POST to OpenRouter, retrying rate limits, 5xx and connection errors.
+
+        Waits back off exponentially with jitter, or follow Retry-After, and
+        all attempts share one CLASSIFICATION_TIMEOUT budget. The last
+        response is returned (or the last error raised) once attempts or
+        budget run out.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CLASSIFICATION_TIMEOUT
+
+        for attempt in range(1, CLASSIFICATION_MAX_ATTEMPTS + 1):
+            last_attempt = attempt == CLASSIFICATION_MAX_ATTEMPTS
+            response = None
+            try:
+                response = await self.client.post(
+                    url,
+                    headers=headers,
+                    json=payload,
+                    timeout=max(deadline - loop.time(), 0)
+                )
+            except httpx.TimeoutException:
+                # The timeout is the remaining budget, so nothing is left
+                raise
+            except httpx.TransportError as e:
+                if last_attempt:
+                    raise
+                error: Exception = e
+                reason = str(e)
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES or last_attempt:
+                    return response
+                reason = str(response.status_code)
+
+            delay = _retry_after_seconds(response) if response is not None else None
+            if delay is None:
+                delay = CLASSIFICATION_RETRY_BASE_DELAY * (2 ** (attempt - 1))
+                delay += random.uniform(0, delay)
+
+            if loop.time() + delay >= deadline:
+                if response is None:
+                    raise error
+                return response
+
+            logger.warning(
+                "openrouter_retrying",
+                attempt=attempt,
+                reason=reason,
+                delay=round(delay, 2)
+            )
+            await asyncio.sleep(delay)
+
     def _parse_classification_response(
         self,
         response: str
@@ -227,21 +520,15 @@ class OpenRouterClassifier:
         response_upper = response.strip().upper()
 
         # Direct match (ideal case)
-        if response_upper == "SIMPLE":
-            return TaskDifficulty.SIMPLE
-        elif response_upper == "COMPLEX":
-            return TaskDifficulty.COMPLEX
-        elif response_upper == "ADVANCED":
-            return TaskDifficulty.ADVANCED
+        difficulty = _RESPONSE_DIFFICULTIES.get(response_upper)
+        if difficulty:
+            return difficulty
 
         # Search for keywords in response (LLM may add explanation)
         # Priority: ADVANCED > COMPLEX > SIMPLE (to avoid false SIMPLE)
-        if "ADVANCED" in response_upper:
-            return TaskDifficulty.ADVANCED
-        elif "COMPLEX" in response_upper:
-            return TaskDifficulty.COMPLEX
-        elif "SIMPLE" in response_upper:
-            return TaskDifficulty.SIMPLE
+        for word, difficulty in _RESPONSE_DIFFICULTIES.items():
+            if word in response_upper:
+                return difficulty
 
         # Failed to parse
         return None
@@ -257,6 +544,11 @@ class LocalDifficultyClassifier:
     - ADVANCED: Code, math, complex reasoning, multi-step problems
     """
 
+    # Keywords are matched as case-insensitive substrings, not whole words:
+    # stems like "calcul", "razon" and "implement" rely on catching
+    # "calculate", "razonamiento" and "implementation", so a token/set lookup
+    # would silently change scores.
+
     # Keywords that indicate advanced difficulty
     ADVANCED_KEYWORDS = [
         # Code-related
@@ -322,20 +614,73 @@ class LocalDifficultyClassifier:
         "sí o no", "yes or no", "verdadero o falso", "true or false",
     ]
 
+    # Keywords used by only one language; everything else (technical terms,
+    # words spelled the same in both) is matched for every language
+    LANGUAGE_KEYWORDS = {
+        "en": frozenset({
+            "code", "program", "function", "algorithm", "implement", "class",
+            "database", "exception", "create a script", "write a script",
+            "generate a program", "develop", "classification", "regression",
+            "model", "training", "sorting", "search algorithm", "recursion",
+            "image", "processing", "generate image", "create image", "math",
+            "equation", "derivative", "probability", "statistics",
+            "markov chain", "reason", "logic", "proof", "theorem",
+            "hypothesis", "deduce", "infer", "architecture", "design pattern",
+            "system design", "optimize", "performance", "automate", "parse",
+            "serialize",
+            "analyze", "analysis", "evaluate", "compare", "comparison",
+            "summarize", "summary", "explain", "explanation", "detail", "list",
+            "enumerate", "identify", "classify", "categorize", "review",
+            "critique", "strategy",
+            "what is", "definition", "translate", "translation", "how much",
+            "how many", "where", "when", "who", "yes or no", "true or false",
+        }),
+        "es": frozenset({
+            "código", "programa", "función", "algoritmo", "implementa", "clase",
+            "crea un script", "escribe un script", "genera un programa",
+            "desarrolla", "modelo", "entrenamiento", "recursivo", "imagen",
+            "procesamiento", "generar imagen", "crear imagen", "matemáticas",
+            "ecuación", "fórmula", "derivada", "probabilidad", "estadística",
+            "cadenas de markov", "razon", "lógica", "prueba", "demostración",
+            "teorema", "hipótesis", "deducir", "inferir", "arquitectura",
+            "patrón de diseño", "diseño de sistema", "optimiza", "rendimiento",
+            "automatiza", "parsear", "serializar",
+            "analiza", "análisis", "evalúa", "compara", "comparación",
+            "contrasta", "resume", "resumen", "sintetiza", "explica",
+            "explicación", "descripción", "detalla", "lista", "enumera",
+            "identifica", "clasifica", "categoriza", "revisa", "critica",
+            "planifica", "estrategia", "organiza",
+            "qué es", "definición", "traduce", "traducción", "cuánto",
+            "cuántos", "dónde", "cuándo", "quién", "sí o no",
+            "verdadero o falso",
+        }),
+    }
+
+    # Mathematical notation that marks a prompt as technical
+    MATH_SYMBOLS = ('∑', '∫', '√', '∂', '≈', '≤', '≥')
+
+    # Compiled once for all instances, see _compile_keyword_pattern
+    KEYWORD_PATTERN = _compile_keyword_pattern(
+        (
+            ("advanced", ADVANCED_KEYWORDS),
+            ("complex", COMPLEX_KEYWORDS),
+            ("simple", SIMPLE_KEYWORDS),
+        ),
+        LANGUAGE_KEYWORDS,
+        CLASSIFIER_LANGUAGES
+    )
+
     def __init__(self):
-        # Compile regex patterns for efficiency
-        self._advanced_pattern = re.compile(
-            '|'.join(re.escape(kw) for kw in self.ADVANCED_KEYWORDS),
-            re.IGNORECASE
-        )
-        self._complex_pattern = re.compile(
-            '|'.join(re.escape(kw) for kw in self.COMPLEX_KEYWORDS),
-            re.IGNORECASE
-        )
-        self._simple_pattern = re.compile(
-            '|'.join(re.escape(kw) for kw in self.SIMPLE_KEYWORDS),
-            re.IGNORECASE
-        )
+        self._cache: OrderedDict[tuple[bytes, int], TaskDifficulty] = OrderedDict()
+
+    def _scan_keywords(self, prompt: str) -> dict[str, list[str]]:
+        """Collect keyword matches per category in one pass over the prompt."""
+        matches: dict[str, list[str]] = {"advanced": [], "complex": [], "simple": []}
+        # Lowercasing once is much cheaper than IGNORECASE folding every
+        # character at each attempted match
+        for match in self.KEYWORD_PATTERN.finditer(prompt.lower()):
+            matches[match.lastgroup].append(match.group())
+        return matches
 
     def classify(
         self,
@@ -362,64 +707,105 @@ class LocalDifficultyClassifier:
             )
             return explicit_difficulty
 
-        # Estimate token count (rough: ~4 chars per token)
-        token_estimate = len(prompt.split())
-        char_count = len(prompt)
-
-        # Score-based classification
-        score = self._calculate_score(
-            prompt,
-            token_estimate,
-            char_count,
-            subtask_count
-        )
-
-        if score >= 70:
-            difficulty = TaskDifficulty.ADVANCED
-        elif score >= 40:
-            difficulty = TaskDifficulty.COMPLEX
+        # Repeated prompts (retries, agent loops) skip scoring entirely
+        cache_key = (_prompt_digest(prompt), subtask_count)
+        cached = _cache_get(self._cache, cache_key)
+        if cached is not None:
+            return cached
+
+        token_estimate = self._estimate_tokens(prompt)
+
+        # Keywords move the score by -15..+40; when no keyword outcome can
+        # change the bucket (e.g. short plain prompts are always SIMPLE),
+        # skip the keyword scan
+        base_score = self._base_score(prompt, token_estimate, subtask_count)
+        difficulty = self._difficulty_for_score(base_score - 15)
+        if difficulty == self._difficulty_for_score(base_score + 40):
+            score = None
         else:
-            difficulty = TaskDifficulty.SIMPLE
+            score = _clamp_score(base_score + self._keyword_score(prompt))
+            difficulty = self._difficulty_for_score(score)
 
         logger.debug(
             "difficulty_classified_local",
             difficulty=difficulty.value,
             score=score,
+            keyword_scan_skipped=score is None,
             token_estimate=token_estimate,
             subtask_count=subtask_count
         )
 
+        _cache_put(self._cache, cache_key, difficulty)
         return difficulty
 
-    def _calculate_score(
+    def confident_difficulty(
         self,
         prompt: str,
-        token_count: int,
-        char_count: int,
-        subtask_count: int
-    ) -> float:
+        subtask_count: int = 1
+    ) -> Optional[TaskDifficulty]:
         """
-        Calculate difficulty score from 0-100.
+        Return the local difficulty when it is unambiguous, else None.
 
-        Scoring breakdown:
-        - Keyword matches: 0-40 points
-        - Length/complexity: 0-30 points
-        - Subtask count: 0-30 points
+        Used to skip the API for obvious cases: very high scores are
+        ADVANCED, and low scores count as SIMPLE only when simple keywords
+        matched and no advanced/complex ones did (a short "write a script"
+        scores low but is ADVANCED).
         """
-        score = 0.0
+        keyword_score = self._keyword_score(prompt)
+        score = _clamp_score(
+            self._base_score(prompt, self._estimate_tokens(prompt), subtask_count)
+            + keyword_score
+        )
+        if score >= CONFIDENT_ADVANCED_SCORE:
+            return TaskDifficulty.ADVANCED
+        if score <= CONFIDENT_SIMPLE_SCORE and keyword_score < 0:
+            return TaskDifficulty.SIMPLE
+        return None
 
-        # Keyword analysis (0-40 points)
-        advanced_matches = len(self._advanced_pattern.findall(prompt))
-        complex_matches = len(self._complex_pattern.findall(prompt))
-        simple_matches = len(self._simple_pattern.findall(prompt))
+    @staticmethod
+    def _estimate_tokens(prompt: str) -> int:
+        """
+        Estimate word count from separators.
+
+        Only the 20/100/200/500 buckets matter, so this avoids building a
+        list of every word.
+        """
+        return prompt.count(' ') + prompt.count('\n') + 1
+
+    @staticmethod
+    def _difficulty_for_score(score: int) -> TaskDifficulty:
+        """Map a 0-100 score to its difficulty bucket."""
+        if score >= 70:
+            return TaskDifficulty.ADVANCED
+        if score >= 40:
+            return TaskDifficulty.COMPLEX
+        return TaskDifficulty.SIMPLE
+
+    def _keyword_score(self, prompt: str) -> int:
+        """Keyword part of the score, between -15 and +40."""
+        matches = self._scan_keywords(prompt)
+        advanced_matches = len(matches["advanced"])
+        complex_matches = len(matches["complex"])
+        simple_matches = len(matches["simple"])
 
         # Advanced keywords have highest weight
         if advanced_matches > 0:
-            score += min(advanced_matches * 15, 40)
-        elif complex_matches > 0:
-            score += min(complex_matches * 10, 25)
-        elif simple_matches > 0:
-            score -= min(simple_matches * 5, 15)
+            return min(advanced_matches * 15, 40)
+        if complex_matches > 0:
+            return min(complex_matches * 10, 25)
+        if simple_matches > 0:
+            return -min(simple_matches * 5, 15)
+        return 0
+
+    def _base_score(
+        self,
+        prompt: str,
+        token_count: int,
+        subtask_count: int
+    ) -> int:
+        """Unclamped score from everything except keywords."""
+        # All increments are integers, so keep the score an int
+        score = 0
 
         # Length analysis (0-30 points)
         if token_count > 500:
@@ -444,10 +830,13 @@ class LocalDifficultyClassifier:
             score += 15
 
         # Detect mathematical notation
-        if any(c in prompt for c in ['∑', '∫', '√', '∂', '≈', '≤', '≥']):
+        # str.__contains__ is a C-level fastsearch, and for prompts stored as
+        # 1-byte strings a non-Latin-1 symbol is rejected without scanning;
+        # this beats a fused regex or set.isdisjoint over the prompt
+        if any(c in prompt for c in self.MATH_SYMBOLS):
             score += 15
 
-        return max(0, min(100, score))
+        return score
 
     def estimate_complexity_reason(self, prompt: str) -> str:
         """
@@ -461,17 +850,22 @@ class LocalDifficultyClassifier:
         """
         reasons = []
 
-        advanced_matches = self._advanced_pattern.findall(prompt)
+        matches = self._scan_keywords(prompt)
+
+        advanced_matches = matches["advanced"]
         if advanced_matches:
-            reasons.append(f"advanced keywords: {', '.join(set(advanced_matches[:3]))}")
+            reasons.append(f"advanced keywords: {', '.join(_first_distinct(advanced_matches))}")
 
-        complex_matches = self._complex_pattern.findall(prompt)
+        complex_matches = matches["complex"]
         if complex_matches and not advanced_matches:
-            reasons.append(f"complex keywords: {', '.join(set(complex_matches[:3]))}")
+            reasons.append(f"complex keywords: {', '.join(_first_distinct(complex_matches))}")
 
-        token_count = len(prompt.split())
-        if token_count > 200:
-            reasons.append(f"long prompt ({token_count} words)")
+        # The separator estimate never undercounts space/newline separated
+        # words, so only prompts it flags as long pay for an exact split
+        if self._estimate_tokens(prompt) > 200:
+            token_count = len(prompt.split())
+            if token_count > 200:
+                reasons.append(f"long prompt ({token_count} words)")
 
         if '```' in prompt:
             reasons.append("contains code blocks")
@@ -482,9 +876,10 @@ class LocalDifficultyClassifier:
         return "; ".join(reasons)
 
 
-# Global instances
-openrouter_classifier = OpenRouterClassifier()
+# Global instances (the API classifier falls back to the shared local one,
+# so both paths use a single result cache)
 local_difficulty_classifier = LocalDifficultyClassifier()
+openrouter_classifier = OpenRouterClassifier(local_difficulty_classifier)
 
 # Backwards compatibility alias
 llm_difficulty_classifier = openrouter_classifier
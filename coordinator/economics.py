@@ -85,40 +85,27 @@ class EconomicsManager:
 
         total_pool = period["total_pool"]
 
-        # Get all nodes with positive reputation
-        nodes = await db.get_all_nodes()
-        eligible_nodes = [
-            n for n in nodes
-            if n.get("reputation", 0) > 0
-        ]
-
-        if not eligible_nodes:
-            logger.warning("no_eligible_nodes", month=month)
-            return {}
-
-        # Calculate total reputation
-        total_reputation = sum(
-            n.get("reputation", 0) for n in eligible_nodes
-        )
-
-        if total_reputation <= 0:
-            return {}
-
-        # Calculate shares
+        # SQLite filters to positive reputation and sums it, so shares are
+        # built in a single pass over the streamed rows
         shares = {}
-        for node in eligible_nodes:
-            node_id = node["id"]
-            reputation = node.get("reputation", 0)
+        total_reputation = 0
+        async for node in db.iter_eligible_nodes():
+            reputation = node["reputation"]
+            total_reputation = node["total_reputation"]
             share_percentage = reputation / total_reputation
             amount = share_percentage * total_pool
 
-            shares[node_id] = {
-                "node_id": node_id,
+            shares[node["id"]] = {
+                "node_id": node["id"],
                 "reputation_snapshot": reputation,
                 "share_percentage": share_percentage * 100,  # as percentage
                 "amount": round(amount, 2)
             }
 
+        if not shares:
+            logger.warning("no_eligible_nodes", month=month)
+            return {}
+
         logger.info(
             "shares_calculated",
             month=month,
@@ -155,26 +142,28 @@ class EconomicsManager:
             logger.warning("no_shares_to_distribute", month=month)
             return {}
 
-        # Record earnings
+        # Record earnings and mark the period distributed atomically
         period_id = period["id"]
-        for node_id, share_info in shares.items():
-            await db.record_node_earning(
-                period_id=period_id,
-                node_id=node_id,
-                reputation_snapshot=share_info["reputation_snapshot"],
-                share_percentage=share_info["share_percentage"],
-                amount=share_info["amount"]
+        rows = [
+            (
+                period_id,
+                node_id,
+                share_info["reputation_snapshot"],
+                share_info["share_percentage"],
+                share_info["amount"]
             )
-
-        # Mark period as distributed
-        await db.mark_period_distributed(period_id)
+            for node_id, share_info in shares.items()
+        ]
+        async with db.transaction():
+            await db.record_node_earnings_bulk(rows, _commit=False)
+            await db.mark_period_distributed(period_id, _commit=False)
 
         logger.info(
             "period_distributed",
             month=month,
             period_id=period_id,
             nodes=len(shares),
-            total_distributed=sum(s["amount"] for s in shares.values())
+            total_distributed=sum(row[4] for row in rows)
         )
 
         return shares
@@ -194,28 +183,11 @@ class EconomicsManager:
         Returns:
             List of earning records
         """
-        async with db.conn.execute(
-            """
-            SELECT ne.*, ep.month
-            FROM node_earnings ne
-            JOIN economic_periods ep ON ne.period_id = ep.id
-            WHERE ne.node_id = ?
-            ORDER BY ep.month DESC
-            LIMIT ?
-            """,
-            (node_id, limit)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        return await db.get_node_earnings(node_id, limit)
 
     async def get_total_earnings(self, node_id: str) -> float:
         """Get total lifetime earnings for a node."""
-        async with db.conn.execute(
-            "SELECT SUM(amount) as total FROM node_earnings WHERE node_id = ?",
-            (node_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row["total"] or 0.0
+        return await db.get_total_earnings(node_id)
 
     async def get_period_summary(self, month: str) -> Optional[dict]:
         """
@@ -232,15 +204,7 @@ class EconomicsManager:
             return None
 
         # Get earnings for this period
-        async with db.conn.execute(
-            """
-            SELECT COUNT(*) as nodes, SUM(amount) as distributed
-            FROM node_earnings
-            WHERE period_id = ?
-            """,
-            (period["id"],)
-        ) as cursor:
-            row = await cursor.fetchone()
+        row = await db.get_period_earnings_summary(period["id"])
 
         return {
             "month": month,
@@ -261,29 +225,19 @@ class EconomicsManager:
         Returns:
             List of projected earnings per node
         """
-        nodes = await db.get_all_nodes()
-        eligible = [n for n in nodes if n.get("reputation", 0) > 0]
-
-        if not eligible:
-            return []
-
-        total_rep = sum(n.get("reputation", 0) for n in eligible)
-
+        # Rows arrive by reputation descending, which is also projected
+        # amount descending
         preview = []
-        for node in eligible:
-            rep = node.get("reputation", 0)
-            share = rep / total_rep if total_rep > 0 else 0
+        async for node in db.iter_eligible_nodes():
+            share = node["reputation"] / node["total_reputation"]
             preview.append({
                 "node_id": node["id"],
-                "model_name": node.get("model_name", "unknown"),
-                "reputation": rep,
+                "model_name": node["model_name"],
+                "reputation": node["reputation"],
                 "share_percentage": round(share * 100, 2),
                 "projected_amount": round(share * total_pool, 2)
             })
 
-        # Sort by projected amount
-        preview.sort(key=lambda x: x["projected_amount"], reverse=True)
-
         return preview
 
 
@@ -5,6 +5,7 @@ FastAPI server that orchestrates the distributed inference network.
 """
 
 import asyncio
+import os
 from contextlib import asynccontextmanager
 from typing import Any, Optional
 
@@ -35,9 +36,12 @@ from .database import db
 from .auth import register_user, login_user, get_current_user, get_user_info
 from .crypto import coordinator_crypto
 from .node_registry import node_registry
-from .node_tokens import NodeTokenManager, TokenValidationResult
+from .task_orchestrator import task_orchestrator
+from .node_tokens import NodeTokenManager, TokenInfo, TokenValidationResult
 from .account_service import account_service
 from .accounts import AccountKeyGenerator
+from .difficulty_classifier import openrouter_classifier
+from .multimodal_processor import multimodal_processor
 
 # Configure structured logging
 structlog.configure(
@@ -72,6 +76,8 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("coordinator_starting")
     await db.connect()
+    await openrouter_classifier.connect()
+    await multimodal_processor.connect()
     coordinator_crypto.initialize()
     token_manager = NodeTokenManager(db)
     # Connect token manager to node registry for enrollment validation
@@ -85,6 +91,8 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("coordinator_shutting_down")
+    await openrouter_classifier.disconnect()
+    await multimodal_processor.disconnect()
     await db.disconnect()
     logger.info("coordinator_stopped")
 
@@ -97,13 +105,19 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# CORS middleware
+# CORS middleware. Origins come from CORS_ORIGINS (comma-separated);
+# set it in production, the "*" default allows any origin
+CORS_ORIGINS = sorted({
+    origin.strip()
+    for origin in os.environ.get("CORS_ORIGINS", "*").split(",")
+    if origin.strip()
+})
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure properly in production
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type"],
 )
 
 # Include dashboard routes
@@ -284,9 +298,6 @@ async def api_inference(
     The request will be divided into subtasks and distributed to available nodes.
     Supports optional file attachments (PDFs, images) for multimodal processing.
     """
-    # Import here to avoid circular imports
-    from .task_orchestrator import task_orchestrator
-
     # Validate files if provided
     if request.files:
         total_size = sum(f.size_bytes for f in request.files)
@@ -310,11 +321,13 @@ async def api_inference(
             enable_streaming=True
         )
 
+        _, subtasks_total = await db.get_subtask_counts(task["id"])
+
         return InferenceResponse(
             task_id=task["id"],
             status=TaskStatus(task["status"]),
             subtasks_completed=0,
-            subtasks_total=len(await db.get_subtasks_by_task(task["id"])),
+            subtasks_total=subtasks_total,
             created_at=task["created_at"]
         )
 
@@ -332,29 +345,28 @@ async def api_get_task(
     user: User = Depends(get_current_user)
 ):
     """Get the status of an inference task."""
-    task = await db.get_task_by_id(task_id)
+    result = await db.get_task_with_subtask_counts(task_id)
 
-    if not task:
+    if not result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
 
+    task, completed, total = result
+
     if task["user_id"] != user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this task"
         )
 
-    subtasks = await db.get_subtasks_by_task(task_id)
-    completed = sum(1 for s in subtasks if s["status"] == "completed")
-
     return InferenceResponse(
         task_id=task["id"],
         status=TaskStatus(task["status"]),
         response=task.get("final_response"),
         subtasks_completed=completed,
-        subtasks_total=len(subtasks),
+        subtasks_total=total,
         created_at=task["created_at"],
         completed_at=task.get("completed_at")
     )
@@ -375,7 +387,7 @@ async def api_stats():
 @app.get("/reputation")
 async def api_reputation():
     """Get node reputation leaderboard."""
-    nodes = await db.get_all_nodes()
+    nodes = await db.get_top_nodes(limit=20)
     return [
         {
             "node_id": n["id"],
@@ -384,7 +396,7 @@ async def api_reputation():
             "tasks_completed": n["total_tasks_completed"],
             "is_online": node_registry.is_online(n["id"])
         }
-        for n in nodes[:20]  # Top 20
+        for n in nodes
     ]
 
 
@@ -459,25 +471,19 @@ async def api_generate_token(
 
     Requires authentication. In production, should require admin role.
     """
-    token, token_id = await token_manager.generate(
+    token, token_id, expires_at = await token_manager.generate(
         label=request.label,
         expires_in_days=request.expires_in_days
     )
 
-    # Calculate expiration date if provided
-    expires_at = None
-    if request.expires_in_days:
-        from datetime import datetime, timedelta
-        expires_at = (datetime.utcnow() + timedelta(days=request.expires_in_days)).isoformat()
-
     return GenerateTokenResponse(
         token=token,
         id=token_id,
-        expires_at=expires_at
+        expires_at=expires_at.isoformat() if expires_at else None
     )
 
 
-@app.get("/admin/tokens")
+@app.get("/admin/tokens", response_model=list[TokenInfo])
 async def api_list_tokens(
     user: User = Depends(get_current_user),
     include_used: bool = True,
@@ -492,10 +498,10 @@ async def api_list_tokens(
         include_used=include_used,
         include_revoked=include_revoked
     )
-    return [t.model_dump() for t in tokens]
+    return tokens
 
 
-@app.get("/admin/tokens/{token_id}")
+@app.get("/admin/tokens/{token_id}", response_model=TokenInfo)
 async def api_get_token(
     token_id: str,
     user: User = Depends(get_current_user)
@@ -511,7 +517,7 @@ async def api_get_token(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Token not found"
         )
-    return token_info.model_dump()
+    return token_info
 
 
 @app.delete("/admin/tokens/{token_id}")
@@ -571,18 +577,14 @@ async def websocket_node(websocket: WebSocket):
 
             elif message.type == MessageType.TASK_RESULT:
                 if node_id:
-                    # Import here to avoid circular imports
-                    from .task_orchestrator import task_orchestrator
                     await task_orchestrator.handle_task_result(node_id, message)
 
             elif message.type == MessageType.TASK_ERROR:
                 if node_id:
-                    from .task_orchestrator import task_orchestrator
                     await task_orchestrator.handle_task_error(node_id, message)
 
             elif message.type == MessageType.TASK_STREAM:
                 if node_id:
-                    from .task_orchestrator import task_orchestrator
                     await task_orchestrator.handle_task_stream(node_id, message)
 
             elif message.type == MessageType.NODE_DISCONNECT:
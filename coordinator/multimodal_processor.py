@@ -13,6 +13,10 @@ No se usa el pipeline de subtasks/nodos para PDFs.
 
 import os
 import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
 from typing import List, Optional, AsyncGenerator
 import httpx
 import structlog
@@ -26,6 +30,76 @@ OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY", "")
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "google/gemini-2.5-flash")
 MULTIMODAL_TIMEOUT = int(os.environ.get("MULTIMODAL_TIMEOUT", "120"))
+# Llamadas simultáneas a Gemini; el resto espera turno en vez de
+# acumular conexiones y errores 429 de OpenRouter
+GEMINI_MAX_CONCURRENT = int(os.environ.get("GEMINI_MAX_CONCURRENT", "8"))
+# Caché de análisis de PDFs: misma consulta sobre los mismos archivos
+# reutiliza la respuesta de Gemini durante GEMINI_CACHE_TTL segundos
+GEMINI_CACHE_TTL = int(os.environ.get("GEMINI_CACHE_TTL", "3600"))
+GEMINI_CACHE_MAX_SIZE = 512
+# A partir de este tamaño la huella de caché se calcula en un hilo para
+# no bloquear el event loop (hashlib libera el GIL)
+CACHE_KEY_THREAD_THRESHOLD = 1024 * 1024
+
+# Instrucciones fijas para Gemini; solo se sustituye la consulta del usuario
+DIRECT_RESPONSE_PROMPT_TEMPLATE = """Eres un asistente útil. El usuario te ha proporcionado documentos PDF adjuntos y una pregunta.
+
+INSTRUCCIONES:
+1. Lee y analiza cuidadosamente los documentos PDF adjuntos
+2. Responde la pregunta del usuario de forma completa y precisa
+3. Basa tu respuesta en el contenido de los documentos
+4. Si los documentos no contienen información relevante, indícalo
+5. Sé claro, conciso y estructurado en tu respuesta
+
+PREGUNTA DEL USUARIO:
+{user_prompt}"""
+
+CONTEXT_EXTRACTION_PROMPT_TEMPLATE = """Analiza los documentos PDF adjuntos en relación a esta consulta del usuario:
+
+CONSULTA DEL USUARIO: {user_prompt}
+
+INSTRUCCIONES:
+1. Examina cada documento PDF cuidadosamente
+2. Extrae la información relevante para responder la consulta
+3. Proporciona un resumen estructurado del contenido
+4. Identifica datos clave, cifras, conceptos importantes
+5. Extrae el texto y estructura principales
+6. NO respondas la pregunta directamente, solo proporciona el contexto extraído
+
+FORMATO DE RESPUESTA:
+## Análisis del Contenido
+[Resumen del contenido de los documentos]
+
+## Información Clave Extraída
+[Datos, cifras y conceptos importantes]
+
+## Contexto Relevante para la Consulta
+[Información específica que ayuda a responder la consulta del usuario]"""
+
+# Prompt que recibe el nodo con el contexto extraído de los archivos
+ENRICHED_PROMPT_TEMPLATE = """El usuario ha proporcionado archivos adjuntos que han sido analizados por un modelo de visión.
+
+## Archivos Adjuntos
+{file_list}
+
+## Consulta Original del Usuario
+{user_prompt}
+
+## Contexto Extraído de los Archivos
+{gemini_response}
+
+## Tu Tarea
+Basándote en el contexto extraído de los archivos, responde la consulta del usuario de forma completa y precisa. Utiliza la información del análisis para fundamentar tu respuesta. Si el contexto no contiene información suficiente para responder, indícalo claramente."""
+
+
+def _digest_parts(parts: tuple[str, ...]) -> bytes:
+    """Huella blake2b de varias cadenas; el prefijo de longitud evita colisiones."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        data = part.encode()
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.digest()
 
 
 class MultimodalProcessor:
@@ -44,10 +118,35 @@ class MultimodalProcessor:
     def __init__(
         self,
         model: str = GEMINI_MODEL,
-        timeout: int = MULTIMODAL_TIMEOUT
+        timeout: int = MULTIMODAL_TIMEOUT,
+        max_concurrent: int = GEMINI_MAX_CONCURRENT
     ):
         self.model = model
         self.timeout = timeout
+        self._gemini_slots = asyncio.Semaphore(max_concurrent)
+        # Respuestas de Gemini por huella de (modelo, consulta, PDFs), en LRU
+        self._analysis_cache: OrderedDict[bytes, tuple[float, str]] = OrderedDict()
+        # Cliente HTTP compartido: reutiliza conexiones keep-alive entre
+        # llamadas en vez de repetir el handshake TCP/TLS
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def connect(self) -> None:
+        """Inicializar el cliente HTTP compartido."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+
+    async def disconnect(self) -> None:
+        """Cerrar el cliente HTTP compartido."""
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Cliente HTTP compartido; se crea al primer uso si no se llamó a connect()."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
 
     async def process_pdf_direct(
         self,
@@ -88,11 +187,12 @@ class MultimodalProcessor:
             # Construir contenido para Gemini
             content_parts = self._build_direct_content(pdfs, user_prompt)
 
-            # Si hay callback de streaming, usar streaming API
-            if stream_callback:
-                return await self._call_gemini_streaming(content_parts, stream_callback)
-            else:
-                return await self._call_gemini_direct(content_parts)
+            async with self._gemini_slots:
+                # Si hay callback de streaming, usar streaming API
+                if stream_callback:
+                    return await self._call_gemini_streaming(content_parts, stream_callback)
+                else:
+                    return await self._call_gemini_direct(content_parts)
 
         except Exception as e:
             logger.error("pdf_direct_processing_error", error=str(e))
@@ -110,29 +210,15 @@ class MultimodalProcessor:
 
         content_parts = []
 
-        # Instrucción para Gemini - responder directamente
-        system_prompt = f"""Eres un asistente útil. El usuario te ha proporcionado documentos PDF adjuntos y una pregunta.
-
-INSTRUCCIONES:
-1. Lee y analiza cuidadosamente los documentos PDF adjuntos
-2. Responde la pregunta del usuario de forma completa y precisa
-3. Basa tu respuesta en el contenido de los documentos
-4. Si los documentos no contienen información relevante, indícalo
-5. Sé claro, conciso y estructurado en tu respuesta
-
-PREGUNTA DEL USUARIO:
-{user_prompt}"""
-
-        content_parts.append({"type": "text", "text": system_prompt})
-
-        # Agregar PDFs
+        # PDFs primero: las preguntas sobre los mismos archivos comparten
+        # prefijo y Gemini puede reutilizarlo de su caché implícita
         for pdf in pdfs:
             if pdf.is_pdf:
                 content_parts.append({
                     "type": "file",
                     "file": {
                         "filename": pdf.filename,
-                        "file_data": f"data:application/pdf;base64,{pdf.content_base64}"
+                        "file_data": pdf.data_uri
                     }
                 })
                 logger.debug(
@@ -141,6 +227,11 @@ PREGUNTA DEL USUARIO:
                     size_kb=pdf.size_bytes / 1024
                 )
 
+        # Instrucción para Gemini - responder directamente
+        system_prompt = DIRECT_RESPONSE_PROMPT_TEMPLATE.format(user_prompt=user_prompt)
+
+        content_parts.append({"type": "text", "text": system_prompt})
+
         return content_parts
 
     async def _call_gemini_direct(self, content_parts: List[dict]) -> str:
@@ -171,23 +262,22 @@ PREGUNTA DEL USUARIO:
             "X-Title": "Iris PDF Processor"
         }
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{OPENROUTER_BASE_URL}/chat/completions",
-                json=payload,
-                headers=headers
-            )
+        response = await self.client.post(
+            f"{OPENROUTER_BASE_URL}/chat/completions",
+            json=payload,
+            headers=headers
+        )
 
-            if response.status_code != 200:
-                error_text = response.text[:500]
-                raise Exception(f"Gemini API error ({response.status_code}): {error_text}")
+        if response.status_code != 200:
+            error_text = response.text[:500]
+            raise Exception(f"Gemini API error ({response.status_code}): {error_text}")
 
-            data = response.json()
-            choices = data.get("choices", [])
-            if not choices:
-                raise Exception("No choices in Gemini response")
+        data = response.json()
+        choices = data.get("choices", [])
+        if not choices:
+            raise Exception("No choices in Gemini response")
 
-            return choices[0].get("message", {}).get("content", "")
+        return choices[0].get("message", {}).get("content", "")
 
     async def _call_gemini_streaming(
         self,
@@ -222,39 +312,40 @@ PREGUNTA DEL USUARIO:
             "X-Title": "Iris PDF Processor"
         }
 
-        full_response = ""
-
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            async with client.stream(
-                "POST",
-                f"{OPENROUTER_BASE_URL}/chat/completions",
-                json=payload,
-                headers=headers
-            ) as response:
-                if response.status_code != 200:
-                    error_text = await response.aread()
-                    raise Exception(f"Gemini API error ({response.status_code}): {error_text[:500]}")
-
-                async for line in response.aiter_lines():
-                    if not line or not line.startswith("data: "):
-                        continue
+        # Los fragmentos se acumulan en una lista y se unen al final
+        chunks: List[str] = []
 
-                    data_str = line[6:]  # Remove "data: " prefix
-                    if data_str == "[DONE]":
-                        break
-
-                    try:
-                        import json
-                        data = json.loads(data_str)
-                        choices = data.get("choices", [])
-                        if choices:
-                            delta = choices[0].get("delta", {})
-                            content = delta.get("content", "")
-                            if content:
-                                full_response += content
-                                await stream_callback(content)
-                    except json.JSONDecodeError:
-                        continue
+        async with self.client.stream(
+            "POST",
+            f"{OPENROUTER_BASE_URL}/chat/completions",
+            json=payload,
+            headers=headers
+        ) as response:
+            if response.status_code != 200:
+                error_text = await response.aread()
+                raise Exception(f"Gemini API error ({response.status_code}): {error_text[:500]}")
+
+            async for line in response.aiter_lines():
+                if not line or not line.startswith("data: "):
+                    continue
+
+                data_str = line[6:]  # Remove "data: " prefix
+                if data_str == "[DONE]":
+                    break
+
+                try:
+                    data = json.loads(data_str)
+                    choices = data.get("choices", [])
+                    if choices:
+                        delta = choices[0].get("delta", {})
+                        content = delta.get("content", "")
+                        if content:
+                            chunks.append(content)
+                            await stream_callback(content)
+                except json.JSONDecodeError:
+                    continue
+
+        full_response = "".join(chunks)
 
         logger.info(
             "gemini_streaming_complete",
@@ -263,10 +354,47 @@ PREGUNTA DEL USUARIO:
 
         return full_response
 
-    async def process_pdfs(
+    async def _analysis_cache_key(
         self,
         pdfs: List[FileAttachment],
         user_prompt: str
+    ) -> bytes:
+        """
+        Huella de tamaño fijo del modelo, la consulta y el contenido de los PDFs.
+
+        La consulta se normaliza (minúsculas, espacios colapsados) para que
+        variantes triviales de la misma pregunta reutilicen el análisis.
+        """
+        query = " ".join(user_prompt.lower().split())
+        parts = (self.model, query, *(pdf.content_base64 for pdf in pdfs))
+        if sum(len(part) for part in parts) >= CACHE_KEY_THREAD_THRESHOLD:
+            return await asyncio.to_thread(_digest_parts, parts)
+        return _digest_parts(parts)
+
+    def _cached_analysis(self, key: bytes) -> Optional[str]:
+        """Respuesta de Gemini en caché si no ha caducado."""
+        entry = self._analysis_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if time.monotonic() >= expires_at:
+            del self._analysis_cache[key]
+            return None
+        self._analysis_cache.move_to_end(key)
+        return response
+
+    def _store_analysis(self, key: bytes, response: str) -> None:
+        """Guarda una respuesta de Gemini, descartando la menos usada."""
+        self._analysis_cache[key] = (time.monotonic() + GEMINI_CACHE_TTL, response)
+        self._analysis_cache.move_to_end(key)
+        if len(self._analysis_cache) > GEMINI_CACHE_MAX_SIZE:
+            self._analysis_cache.popitem(last=False)
+
+    async def process_pdfs(
+        self,
+        pdfs: List[FileAttachment],
+        user_prompt: str,
+        use_cache: bool = True
     ) -> str:
         """
         Procesa PDFs con Gemini y retorna prompt enriquecido.
@@ -277,6 +405,8 @@ PREGUNTA DEL USUARIO:
         Args:
             pdfs: Lista de archivos PDF
             user_prompt: Prompt original del usuario
+            use_cache: Reutilizar el análisis de una consulta idéntica
+                sobre los mismos PDFs
 
         Returns:
             Prompt enriquecido con el contexto extraído de los PDFs
@@ -301,11 +431,27 @@ PREGUNTA DEL USUARIO:
         )
 
         try:
-            # Construir contenido para Gemini (solo PDFs)
-            content_parts = self._build_content_parts(pdf_files, user_prompt)
-
-            # Enviar a Gemini via OpenRouter
-            gemini_response = await self._call_gemini(content_parts)
+            if len(pdf_files) == 1:
+                gemini_response = await self._analyze_pdfs(pdf_files, user_prompt, use_cache)
+            else:
+                # Un análisis por PDF, en paralelo (limitado por _gemini_slots)
+                results = await asyncio.gather(
+                    *(self._analyze_pdfs([pdf], user_prompt, use_cache) for pdf in pdf_files),
+                    return_exceptions=True
+                )
+                sections = []
+                for pdf, result in zip(pdf_files, results):
+                    if isinstance(result, BaseException):
+                        logger.error(
+                            "pdf_analysis_failed",
+                            filename=pdf.filename,
+                            error=str(result)
+                        )
+                        continue
+                    sections.append(f"[{pdf.filename}]\n{result}")
+                if not sections:
+                    raise Exception("No se pudo analizar ningún PDF")
+                gemini_response = "\n\n".join(sections)
 
             # Construir prompt enriquecido
             enriched_prompt = self._build_enriched_prompt(
@@ -327,56 +473,62 @@ PREGUNTA DEL USUARIO:
             # Fallback: retornar prompt indicando que hay archivos
             return self._fallback_prompt(pdf_files, user_prompt)
 
+    async def _analyze_pdfs(
+        self,
+        pdfs: List[FileAttachment],
+        user_prompt: str,
+        use_cache: bool
+    ) -> str:
+        """Extrae con Gemini el contexto de los PDFs, reutilizando la caché."""
+        cache_key = await self._analysis_cache_key(pdfs, user_prompt)
+        if use_cache:
+            cached = self._cached_analysis(cache_key)
+            if cached is not None:
+                logger.info("pdf_analysis_cached", file_count=len(pdfs))
+                return cached
+
+        # Construir contenido para Gemini (solo PDFs)
+        content_parts = self._build_content_parts(pdfs, user_prompt)
+
+        # Enviar a Gemini via OpenRouter
+        async with self._gemini_slots:
+            gemini_response = await self._call_gemini(content_parts)
+        self._store_analysis(cache_key, gemini_response)
+        return gemini_response
+
     def _build_content_parts(
         self,
         pdfs: List[FileAttachment],
         user_prompt: str
     ) -> List[dict]:
-        """Construye las partes del contenido para Gemini (solo PDFs)."""
-
-        content_parts = []
-
-        # Instrucción para Gemini
-        analysis_prompt = f"""Analiza los siguientes documentos PDF en relación a esta consulta del usuario:
-
-CONSULTA DEL USUARIO: {user_prompt}
+        """
+        Construye las partes del contenido para Gemini.
 
-INSTRUCCIONES:
-1. Examina cada documento PDF cuidadosamente
-2. Extrae la información relevante para responder la consulta
-3. Proporciona un resumen estructurado del contenido
-4. Identifica datos clave, cifras, conceptos importantes
-5. Extrae el texto y estructura principales
-6. NO respondas la pregunta directamente, solo proporciona el contexto extraído
+        Espera solo PDFs: process_pdfs ya filtra los adjuntos.
+        """
 
-FORMATO DE RESPUESTA:
-## Análisis del Contenido
-[Resumen del contenido de los documentos]
+        content_parts = []
 
-## Información Clave Extraída
-[Datos, cifras y conceptos importantes]
+        # PDFs primero, como en _build_direct_content, para compartir prefijo
+        for pdf in pdfs:
+            content_parts.append({
+                "type": "file",
+                "file": {
+                    "filename": pdf.filename,
+                    "file_data": pdf.data_uri
+                }
+            })
+            logger.debug(
+                "added_pdf_to_request",
+                filename=pdf.filename,
+                size_kb=pdf.size_bytes / 1024
+            )
 
-## Contexto Relevante para la Consulta
-[Información específica que ayuda a responder la consulta del usuario]"""
+        # Instrucción para Gemini
+        analysis_prompt = CONTEXT_EXTRACTION_PROMPT_TEMPLATE.format(user_prompt=user_prompt)
 
         content_parts.append({"type": "text", "text": analysis_prompt})
 
-        # Agregar PDFs
-        for pdf in pdfs:
-            if pdf.is_pdf:
-                content_parts.append({
-                    "type": "file",
-                    "file": {
-                        "filename": pdf.filename,
-                        "file_data": f"data:application/pdf;base64,{pdf.content_base64}"
-                    }
-                })
-                logger.debug(
-                    "added_pdf_to_request",
-                    filename=pdf.filename,
-                    size_kb=pdf.size_bytes / 1024
-                )
-
         return content_parts
 
     async def _call_gemini(self, content_parts: List[dict]) -> str:
@@ -407,52 +559,51 @@ FORMATO DE RESPUESTA:
             "X-Title": "Iris Multimodal Processor"
         }
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            logger.debug(
-                "calling_gemini_api",
-                model=self.model,
-                content_parts_count=len(content_parts)
-            )
+        logger.debug(
+            "calling_gemini_api",
+            model=self.model,
+            content_parts_count=len(content_parts)
+        )
+
+        response = await self.client.post(
+            f"{OPENROUTER_BASE_URL}/chat/completions",
+            json=payload,
+            headers=headers
+        )
 
-            response = await client.post(
-                f"{OPENROUTER_BASE_URL}/chat/completions",
-                json=payload,
-                headers=headers
+        if response.status_code != 200:
+            error_text = response.text[:500]
+            logger.error(
+                "gemini_api_error",
+                status_code=response.status_code,
+                response=error_text
+            )
+            raise Exception(
+                f"Gemini API error ({response.status_code}): {error_text}"
             )
 
-            if response.status_code != 200:
-                error_text = response.text[:500]
-                logger.error(
-                    "gemini_api_error",
-                    status_code=response.status_code,
-                    response=error_text
-                )
-                raise Exception(
-                    f"Gemini API error ({response.status_code}): {error_text}"
-                )
+        data = response.json()
 
-            data = response.json()
-
-            # Extraer respuesta
-            choices = data.get("choices", [])
-            if not choices:
-                raise Exception("No choices in Gemini response")
-
-            content = choices[0].get("message", {}).get("content", "")
-            if not content:
-                raise Exception("Empty content in Gemini response")
-
-            # Log usage stats if available
-            usage = data.get("usage", {})
-            if usage:
-                logger.info(
-                    "gemini_usage",
-                    prompt_tokens=usage.get("prompt_tokens"),
-                    completion_tokens=usage.get("completion_tokens"),
-                    total_tokens=usage.get("total_tokens")
-                )
+        # Extraer respuesta
+        choices = data.get("choices", [])
+        if not choices:
+            raise Exception("No choices in Gemini response")
+
+        content = choices[0].get("message", {}).get("content", "")
+        if not content:
+            raise Exception("Empty content in Gemini response")
+
+        # Log usage stats if available
+        usage = data.get("usage", {})
+        if usage:
+            logger.info(
+                "gemini_usage",
+                prompt_tokens=usage.get("prompt_tokens"),
+                completion_tokens=usage.get("completion_tokens"),
+                total_tokens=usage.get("total_tokens")
+            )
 
-            return content
+        return content
 
     def _build_enriched_prompt(
         self,
@@ -468,19 +619,11 @@ FORMATO DE RESPUESTA:
             for f in files
         ])
 
-        enriched_prompt = f"""El usuario ha proporcionado archivos adjuntos que han sido analizados por un modelo de visión.
-
-## Archivos Adjuntos
-{file_list}
-
-## Consulta Original del Usuario
-{user_prompt}
-
-## Contexto Extraído de los Archivos
-{gemini_response}
-
-## Tu Tarea
-Basándote en el contexto extraído de los archivos, responde la consulta del usuario de forma completa y precisa. Utiliza la información del análisis para fundamentar tu respuesta. Si el contexto no contiene información suficiente para responder, indícalo claramente."""
+        enriched_prompt = ENRICHED_PROMPT_TEMPLATE.format(
+            file_list=file_list,
+            user_prompt=user_prompt,
+            gemini_response=gemini_response
+        )
 
         return enriched_prompt
 
@@ -31,6 +31,9 @@ logger = structlog.get_logger()
 
 # Constants
 HEARTBEAT_TIMEOUT = timedelta(seconds=90)  # Node considered offline after this
+# Heartbeats arrive every 30s; last_seen_at in the database only needs to be
+# roughly current, so it is written at most this often per node
+LAST_SEEN_PERSIST_INTERVAL = timedelta(minutes=5)
 
 # Selection algorithm weights (SED + P2C hybrid)
 SELECTION_WEIGHTS = {
@@ -201,6 +204,8 @@ class ConnectedNode:
     current_load: int = 0
     connected_at: datetime = field(default_factory=datetime.utcnow)
     last_heartbeat: datetime = field(default_factory=datetime.utcnow)
+    # Registration writes last_seen_at, so a new connection starts in sync
+    last_seen_persisted_at: datetime = field(default_factory=datetime.utcnow)
     latency_ms: Optional[float] = None
     # Extended capabilities
     gpu_name: str = "Unknown"
@@ -610,8 +615,11 @@ class NodeRegistry:
             if payload.tokens_per_second is not None and payload.tokens_per_second > 0:
                 node.tokens_per_second = payload.tokens_per_second
 
-            # Update database
-            await db.update_node_last_seen(node_id)
+            # In-memory state above is what selection and is_online use;
+            # the database copy is refreshed only periodically
+            if received_at - node.last_seen_persisted_at >= LAST_SEEN_PERSIST_INTERVAL:
+                await db.update_node_last_seen(node_id)
+                node.last_seen_persisted_at = received_at
 
             # Send acknowledgment
             ack = ProtocolMessage.create(
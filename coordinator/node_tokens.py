@@ -190,7 +190,7 @@ class NodeTokenManager:
         self,
         label: Optional[str] = None,
         expires_in_days: Optional[int] = None
-    ) -> tuple[str, str]:
+    ) -> tuple[str, str, Optional[datetime]]:
         """
         Generate and store a new enrollment token.
 
@@ -199,27 +199,28 @@ class NodeTokenManager:
             expires_in_days: Optional expiration in days
 
         Returns:
-            Tuple of (token_string, token_id)
+            Tuple of (token_string, token_id, expires_at)
         """
         token, payload = generate_token(label, expires_in_days)
         token_hash = hash_token(token)
+        expires_at = datetime.fromtimestamp(payload.exp) if payload.exp else None
 
         # Store in database
-        await self.db.conn.execute(
-            """
-            INSERT INTO node_tokens (id, token_hash, expires_at, label)
-            VALUES (?, ?, ?, ?)
-            """,
-            (
-                payload.jti,
-                token_hash,
-                datetime.fromtimestamp(payload.exp) if payload.exp else None,
-                label
+        async with self.db.writer() as conn:
+            await conn.execute(
+                """
+                INSERT INTO node_tokens (id, token_hash, expires_at, label)
+                VALUES (?, ?, ?, ?)
+                """,
+                (
+                    payload.jti,
+                    token_hash,
+                    expires_at,
+                    label
+                )
             )
-        )
-        await self.db.conn.commit()
 
-        return token, payload.jti
+        return token, payload.jti, expires_at
 
     async def validate(self, token: str) -> TokenValidationResult:
         """
@@ -255,11 +256,7 @@ class NodeTokenManager:
 
         # Check database state
         token_hash = hash_token(token)
-        async with self.db.conn.execute(
-            "SELECT * FROM node_tokens WHERE id = ? AND token_hash = ?",
-            (payload.jti, token_hash)
-        ) as cursor:
-            row = await cursor.fetchone()
+        row = await self.db.get_node_token(payload.jti, token_hash)
 
         if not row:
             return TokenValidationResult(
@@ -268,7 +265,7 @@ class NodeTokenManager:
                 error="Token not found"
             )
 
-        token_data = dict(row)
+        token_data = row
 
         if token_data.get("revoked"):
             return TokenValidationResult(
@@ -307,15 +304,15 @@ class NodeTokenManager:
 
         token_hash = hash_token(token)
 
-        result = await self.db.conn.execute(
-            """
-            UPDATE node_tokens
-            SET used_at = ?, used_by_node_id = ?
-            WHERE id = ? AND token_hash = ? AND used_at IS NULL AND revoked = FALSE
-            """,
-            (datetime.utcnow(), node_id, payload.jti, token_hash)
-        )
-        await self.db.conn.commit()
+        async with self.db.writer() as conn:
+            result = await conn.execute(
+                """
+                UPDATE node_tokens
+                SET used_at = CURRENT_TIMESTAMP, used_by_node_id = ?
+                WHERE id = ? AND token_hash = ? AND used_at IS NULL AND revoked = 0
+                """,
+                (node_id, payload.jti, token_hash)
+            )
 
         if result.rowcount > 0:
             logger.info(
@@ -337,12 +334,7 @@ class NodeTokenManager:
         Returns:
             True if the node was enrolled with a token
         """
-        async with self.db.conn.execute(
-            "SELECT id FROM node_tokens WHERE used_by_node_id = ?",
-            (node_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row is not None
+        return await self.db.get_node_token_id_for_node(node_id) is not None
 
     async def get_token_for_node(self, node_id: str) -> Optional[str]:
         """
@@ -354,12 +346,7 @@ class NodeTokenManager:
         Returns:
             Token ID if found, None otherwise
         """
-        async with self.db.conn.execute(
-            "SELECT id FROM node_tokens WHERE used_by_node_id = ?",
-            (node_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row["id"] if row else None
+        return await self.db.get_node_token_id_for_node(node_id)
 
     async def revoke(self, token_id: str) -> bool:
         """
@@ -371,11 +358,11 @@ class NodeTokenManager:
         Returns:
             True if successfully revoked, False otherwise
         """
-        result = await self.db.conn.execute(
-            "UPDATE node_tokens SET revoked = TRUE WHERE id = ?",
-            (token_id,)
-        )
-        await self.db.conn.commit()
+        async with self.db.writer() as conn:
+            result = await conn.execute(
+                "UPDATE node_tokens SET revoked = 1 WHERE id = ?",
+                (token_id,)
+            )
 
         if result.rowcount > 0:
             logger.info("token_revoked", token_id=token_id)
@@ -398,18 +385,7 @@ class NodeTokenManager:
         Returns:
             List of TokenInfo objects
         """
-        conditions = []
-        if not include_used:
-            conditions.append("used_at IS NULL")
-        if not include_revoked:
-            conditions.append("revoked = FALSE")
-
-        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
-
-        async with self.db.conn.execute(
-            f"SELECT * FROM node_tokens {where_clause} ORDER BY created_at DESC"
-        ) as cursor:
-            rows = await cursor.fetchall()
+        rows = await self.db.get_node_tokens(include_used, include_revoked)
 
         return [
             TokenInfo(
@@ -435,11 +411,7 @@ class NodeTokenManager:
         Returns:
             TokenInfo if found, None otherwise
         """
-        async with self.db.conn.execute(
-            "SELECT * FROM node_tokens WHERE id = ?",
-            (token_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
+        row = await self.db.get_node_token(token_id)
 
         if not row:
             return None
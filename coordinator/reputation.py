@@ -59,7 +59,8 @@ class ReputationSystem:
         self,
         node_id: str,
         change: float,
-        reason: ReputationChangeReason
+        reason: ReputationChangeReason,
+        increment_tasks: bool = False
     ) -> float:
         """
         Update a node's reputation.
@@ -68,6 +69,7 @@ class ReputationSystem:
             node_id: Node ID
             change: Points to add/subtract
             reason: Reason for change
+            increment_tasks: Also bump the node's completed task count
 
         Returns:
             New reputation value
@@ -78,11 +80,14 @@ class ReputationSystem:
         # Calculate new reputation (with minimum)
         new_reputation = max(MIN_REPUTATION, current + change)
 
-        # Update in database
-        await db.update_node_reputation(node_id, new_reputation)
-
-        # Log the change
-        await db.log_reputation_change(node_id, change, reason.value)
+        # Update and log the change with a single commit
+        async with db.transaction():
+            if increment_tasks:
+                await db.increment_node_tasks(node_id, _commit=False)
+            await db.update_node_reputation(node_id, new_reputation, _commit=False)
+            await db.log_reputation_change(
+                node_id, change, reason.value, _commit=False
+            )
 
         logger.info(
             "reputation_updated",
@@ -127,10 +132,10 @@ class ReputationSystem:
         else:
             reason = ReputationChangeReason.TASK_COMPLETED
 
-        # Update task count
-        await db.increment_node_tasks(node_id)
-
-        return await self._update_reputation(node_id, change, reason)
+        # Task count is updated in the same commit as the reputation
+        return await self._update_reputation(
+            node_id, change, reason, increment_tasks=True
+        )
 
     async def record_task_timeout(self, node_id: str) -> float:
         """
@@ -220,27 +225,34 @@ class ReputationSystem:
         Returns:
             Dictionary of node_id -> new reputation
         """
-        nodes = await db.get_all_nodes()
         results = {}
 
-        for node in nodes:
-            node_id = node["id"]
-            current = node.get("reputation", INITIAL_REPUTATION)
-
-            # Calculate decay
-            decay = current * WEEKLY_DECAY_PERCENT
-
-            # Apply (with minimum)
-            new_reputation = max(MIN_REPUTATION, current - decay)
+        # Read every node before writing: a scan left open on the writer
+        # while its rows are updated could visit the same node twice
+        nodes = await db.get_all_nodes()
 
-            if new_reputation != current:
-                await db.update_node_reputation(node_id, new_reputation)
-                await db.log_reputation_change(
-                    node_id,
-                    -decay,
-                    ReputationChangeReason.WEEKLY_DECAY.value
-                )
-                results[node_id] = new_reputation
+        async with db.transaction():
+            for node in nodes:
+                node_id = node["id"]
+                current = node.get("reputation", INITIAL_REPUTATION)
+
+                # Calculate decay
+                decay = current * WEEKLY_DECAY_PERCENT
+
+                # Apply (with minimum)
+                new_reputation = max(MIN_REPUTATION, current - decay)
+
+                if new_reputation != current:
+                    await db.update_node_reputation(
+                        node_id, new_reputation, _commit=False
+                    )
+                    await db.log_reputation_change(
+                        node_id,
+                        -decay,
+                        ReputationChangeReason.WEEKLY_DECAY.value,
+                        _commit=False
+                    )
+                    results[node_id] = new_reputation
 
         logger.info("weekly_decay_applied", nodes_affected=len(results))
         return results
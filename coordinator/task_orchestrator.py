@@ -34,6 +34,7 @@ from shared.protocol import (
 from .database import db
 from .crypto import coordinator_crypto
 from .node_registry import node_registry, circuit_breaker
+from .reputation import reputation_system
 from .difficulty_classifier import classify_task_difficulty, classify_task_difficulty_async
 from .streaming import streaming_manager
 
@@ -70,8 +71,9 @@ class TaskOrchestrator:
     """
 
     def __init__(self):
-        self._pending_subtasks: dict[str, asyncio.Event] = {}
-        self._subtask_results: dict[str, str] = {}
+        # In-flight subtasks; each future resolves with the response text,
+        # or None if the node reported an error
+        self._pending_subtasks: dict[str, asyncio.Future[Optional[str]]] = {}
 
     async def create_task(
         self,
@@ -330,15 +332,12 @@ class TaskOrchestrator:
                 explicit_difficulty=difficulty
             )
 
-            # Create subtask records
-            subtasks = []
-            for sp in subtask_prompts:
-                subtask = await db.create_subtask(
-                    id=generate_id(),
-                    task_id=task_id,
-                    prompt=sp
-                )
-                subtasks.append(subtask)
+            # Create subtask records in one batch
+            await db.create_subtasks_bulk([
+                (generate_id(), task_id, sp, None)
+                for sp in subtask_prompts
+            ])
+            subtasks = await db.get_subtasks_by_task(task_id)
 
             logger.info(
                 "subtasks_created",
@@ -836,14 +835,14 @@ class TaskOrchestrator:
         """
         subtask_id = subtask["id"]
 
-        if subtask_id not in self._pending_subtasks:
+        future = self._pending_subtasks.get(subtask_id)
+        if future is None:
             return "failed"
 
         try:
-            await asyncio.wait_for(
-                self._pending_subtasks[subtask_id].wait(),
-                timeout=timeout
-            )
+            # shield() keeps the future alive across a timeout so a
+            # reassigned node can still resolve it
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
             return "completed"
 
         except asyncio.TimeoutError:
@@ -865,7 +864,7 @@ class TaskOrchestrator:
                 reassign_timeout = max(30, timeout // 2)
                 try:
                     await asyncio.wait_for(
-                        self._pending_subtasks[subtask_id].wait(),
+                        asyncio.shield(future),
                         timeout=reassign_timeout
                     )
                     return "reassigned"
@@ -899,9 +898,10 @@ class TaskOrchestrator:
             timeout: Base timeout per subtask in seconds
             enable_streaming: If True, enable streaming for reassignments
         """
-        # Create events for each subtask
+        # Create a future for each subtask
+        loop = asyncio.get_running_loop()
         for subtask in subtasks:
-            self._pending_subtasks[subtask["id"]] = asyncio.Event()
+            self._pending_subtasks[subtask["id"]] = loop.create_future()
 
         try:
             # Wait for all subtasks with individual timeouts
@@ -934,10 +934,20 @@ class TaskOrchestrator:
             )
 
         finally:
-            # Clean up events
+            # Clean up futures
             for subtask in subtasks:
                 self._pending_subtasks.pop(subtask["id"], None)
 
+    def _resolve_pending_subtask(
+        self,
+        subtask_id: str,
+        response: Optional[str]
+    ) -> None:
+        """Resolve a waiting subtask, ignoring late or duplicate results."""
+        future = self._pending_subtasks.get(subtask_id)
+        if future is not None and not future.done():
+            future.set_result(response)
+
     async def handle_task_result(
         self,
         node_id: str,
@@ -967,12 +977,8 @@ class TaskOrchestrator:
                 execution_time_ms=payload.execution_time_ms
             )
 
-            # Store result
-            self._subtask_results[payload.subtask_id] = response
-
-            # Signal completion
-            if payload.subtask_id in self._pending_subtasks:
-                self._pending_subtasks[payload.subtask_id].set()
+            # Signal completion with the result
+            self._resolve_pending_subtask(payload.subtask_id, response)
 
             # Update node load
             node_registry.decrement_load(node_id)
@@ -981,7 +987,6 @@ class TaskOrchestrator:
             await circuit_breaker.record_success(node_id)
 
             # Update reputation (async)
-            from .reputation import reputation_system
             asyncio.create_task(
                 reputation_system.record_task_completed(
                     node_id,
@@ -1021,8 +1026,7 @@ class TaskOrchestrator:
         await db.fail_subtask(payload.subtask_id, SubtaskStatus.FAILED.value)
 
         # Signal completion (even though failed)
-        if payload.subtask_id in self._pending_subtasks:
-            self._pending_subtasks[payload.subtask_id].set()
+        self._resolve_pending_subtask(payload.subtask_id, None)
 
         # Update node load
         node_registry.decrement_load(node_id)
@@ -1037,7 +1041,6 @@ class TaskOrchestrator:
         )
 
         # Update reputation
-        from .reputation import reputation_system
         asyncio.create_task(
             reputation_system.record_task_failed(node_id, payload.error_code)
         )
@@ -25,14 +25,14 @@ async def create_enrollment_token(label: str = "manual-token"):
     token_hash = hash_token(token)
 
     # Insertar en la base de datos
-    await db.conn.execute(
-        """
-        INSERT INTO node_tokens (id, token_hash, label)
-        VALUES (?, ?, ?)
-        """,
-        (payload.jti, token_hash, label)
-    )
-    await db.conn.commit()
+    async with db.writer() as conn:
+        await conn.execute(
+            """
+            INSERT INTO node_tokens (id, token_hash, label)
+            VALUES (?, ?, ?)
+            """,
+            (payload.jti, token_hash, label)
+        )
 
     await db.disconnect()
 
@@ -305,6 +305,11 @@ class FileAttachment(BaseModel):
         """Check if this is a PDF file."""
         return self.mime_type == 'application/pdf'
 
+    @property
+    def data_uri(self) -> str:
+        """Content as a base64 data URI, as expected by OpenRouter file parts."""
+        return f"data:{self.mime_type};base64,{self.content_base64}"
+
 
 # =============================================================================
 # Inference Request/Response
@@ -0,0 +1,287 @@
+"""
+Tests for the local difficulty classifier.
+"""
+
+import asyncio
+import httpx
+import pytest
+from unittest.mock import patch
+from shared.models import TaskDifficulty
+from coordinator.difficulty_classifier import LocalDifficultyClassifier
+
+
+class TestLocalDifficultyClassifier:
+    """Tests for keyword-based difficulty classification."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.classifier = LocalDifficultyClassifier()
+
+    def test_simple_question(self):
+        """Test short factual questions are SIMPLE."""
+        assert self.classifier.classify("What is the capital of France?") == TaskDifficulty.SIMPLE
+
+    def test_complex_request(self):
+        """Test analysis requests with several subtasks are COMPLEX."""
+        difficulty = self.classifier.classify(
+            "Compare and summarize these two essays",
+            subtask_count=5
+        )
+        assert difficulty == TaskDifficulty.COMPLEX
+
+    def test_advanced_request(self):
+        """Test code requests with code blocks are ADVANCED."""
+        prompt = "Debug this code and optimize the algorithm:\n```\ndef f(x): return x\n```"
+        assert self.classifier.classify(prompt, subtask_count=3) == TaskDifficulty.ADVANCED
+
+    def test_keywords_are_case_insensitive(self):
+        """Test keyword matching ignores case."""
+        lower = self.classifier._keyword_score("write code")
+        upper = self.classifier._keyword_score("WRITE CODE")
+        assert lower == upper > 0
+
+    def test_short_plain_prompt_skips_keyword_scan(self):
+        """Test prompts no keyword can lift past SIMPLE are not scanned."""
+        with patch.object(self.classifier, "_scan_keywords") as scan:
+            assert self.classifier.classify("write code") == TaskDifficulty.SIMPLE
+            scan.assert_not_called()
+
+            # Code plus math leaves room for keywords to reach COMPLEX
+            scan.return_value = {"advanced": ["sql"], "complex": [], "simple": []}
+            assert self.classifier.classify("def ∑sql") == TaskDifficulty.COMPLEX
+            scan.assert_called_once()
+
+    def test_explicit_difficulty_wins(self):
+        """Test explicit difficulty overrides the keyword score."""
+        difficulty = self.classifier.classify(
+            "hi",
+            explicit_difficulty=TaskDifficulty.ADVANCED
+        )
+        assert difficulty == TaskDifficulty.ADVANCED
+
+    def test_complexity_reason(self):
+        """Test the reason lists matched keywords by category."""
+        assert "advanced keywords: code" in self.classifier.estimate_complexity_reason("fix my code")
+        assert "complex keywords: explain" in self.classifier.estimate_complexity_reason("explain this")
+        assert self.classifier.estimate_complexity_reason("hello") == "standard request"
+
+    def test_complexity_reason_is_ordered_and_distinct(self):
+        """Test the reason lists up to three distinct keywords in prompt order."""
+        reason = self.classifier.estimate_complexity_reason(
+            "code, code, sql, code, json, debug"
+        )
+        assert reason == "advanced keywords: code, sql, json"
+
+    def test_repeated_prompts_are_cached(self):
+        """Test classifications are cached per prompt and subtask count."""
+        from coordinator import difficulty_classifier as dc
+
+        self.classifier.classify("explain this", subtask_count=1)
+        self.classifier.classify("explain this", subtask_count=1)
+        self.classifier.classify("explain this", subtask_count=5)
+        assert len(self.classifier._cache) == 2
+
+        for i in range(dc.CLASSIFICATION_CACHE_MAX_SIZE + 1):
+            self.classifier.classify(f"prompt {i}")
+        assert len(self.classifier._cache) == dc.CLASSIFICATION_CACHE_MAX_SIZE
+
+    def test_longest_keyword_wins(self):
+        """Test multi-word keywords are reported whole, not by their prefix."""
+        reason = self.classifier.estimate_complexity_reason("simulate a markov chain")
+        assert reason == "advanced keywords: markov chain"
+
+    def test_keywords_match_inside_words(self):
+        """Test keyword stems match inflected words, not only whole tokens."""
+        for prompt in ("calculate the total", "implementation notes", "show your reasoning"):
+            matches = self.classifier._scan_keywords(prompt)
+            assert matches["advanced"], prompt
+
+    def test_pattern_compiled_for_enabled_languages(self):
+        """Test keywords of disabled languages are left out of the pattern."""
+        from coordinator import difficulty_classifier as dc
+
+        cls = LocalDifficultyClassifier
+        pattern = dc._compile_keyword_pattern(
+            (("advanced", cls.ADVANCED_KEYWORDS),),
+            cls.LANGUAGE_KEYWORDS,
+            frozenset({"en"})
+        )
+        assert pattern.search("write code")
+        assert pattern.search("escribe json")
+        assert not pattern.search("escribe código")
+
+
+def test_global_classifiers_share_local_fallback():
+    """Test the API classifier falls back to the shared local instance."""
+    from coordinator import difficulty_classifier as dc
+
+    assert dc.openrouter_classifier._local_classifier is dc.local_difficulty_classifier
+
+
+@pytest.mark.asyncio
+async def test_openrouter_cache_ignores_case_and_whitespace():
+    """Test near-identical prompts reuse a cached API classification."""
+    from coordinator import difficulty_classifier as dc
+
+    classifier = dc.OpenRouterClassifier()
+    response = httpx.Response(
+        200,
+        json={"choices": [{"message": {"content": "ADVANCED"}}]},
+        request=httpx.Request("POST", dc.OPENROUTER_BASE_URL)
+    )
+
+    with patch.object(dc, "OPENROUTER_API_KEY", "test-key"), \
+            patch.object(httpx.AsyncClient, "post", return_value=response) as post:
+        first = await classifier.classify("Write a sorting algorithm")
+        second = await classifier.classify("  write a SORTING\nalgorithm ")
+
+    assert first == second == TaskDifficulty.ADVANCED
+    post.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_openrouter_concurrent_identical_prompts_share_request():
+    """Test concurrent classifications of one prompt make a single API call."""
+    from coordinator import difficulty_classifier as dc
+
+    classifier = dc.OpenRouterClassifier()
+    calls = 0
+
+    async def request(prompt):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return TaskDifficulty.COMPLEX
+
+    with patch.object(dc, "OPENROUTER_API_KEY", "test-key"), \
+            patch.object(classifier, "_request_classification", side_effect=request):
+        results = await asyncio.gather(*[
+            classifier.classify("Summarize this essay") for _ in range(5)
+        ])
+
+    assert results == [TaskDifficulty.COMPLEX] * 5
+    assert calls == 1
+    assert classifier._in_flight == {}
+
+
+@pytest.mark.asyncio
+async def test_openrouter_client_is_pooled():
+    """Test the HTTP client is created once and closed on disconnect."""
+    from coordinator import difficulty_classifier as dc
+
+    classifier = dc.OpenRouterClassifier()
+    await classifier.connect()
+    client = classifier.client
+    assert classifier.client is client
+
+    await classifier.disconnect()
+    assert client.is_closed
+    assert classifier._client is None
+
+
+@pytest.mark.asyncio
+async def test_openrouter_request_has_static_system_prefix():
+    """Test the instructions are sent as a fixed system message."""
+    from coordinator import difficulty_classifier as dc
+
+    classifier = dc.OpenRouterClassifier()
+    response = httpx.Response(
+        200,
+        json={"choices": [{"message": {"content": "SIMPLE"}}]},
+        request=httpx.Request("POST", dc.OPENROUTER_BASE_URL)
+    )
+
+    with patch.object(dc, "OPENROUTER_API_KEY", "test-key"), \
+            patch.object(httpx.AsyncClient, "post", return_value=response) as post:
+        await classifier.classify("Tell me about atoms")
+        await classifier.classify("Write a poem about the sea")
+
+    first, second = (call.kwargs["json"]["messages"] for call in post.call_args_list)
+    assert first[0] == second[0] == {
+        "role": "system",
+        "content": dc.CLASSIFICATION_SYSTEM_PROMPT
+    }
+    assert "Tell me about atoms" in first[1]["content"]
+
+
+@pytest.mark.asyncio
+async def test_openrouter_skips_api_for_obvious_prompts():
+    """Test unambiguous prompts are classified locally without an API call."""
+    from coordinator import difficulty_classifier as dc
+
+    classifier = dc.OpenRouterClassifier()
+    advanced = (
+        "Debug this code, fix the sql query and optimize the ∑ algorithm:\n"
+        "```\ndef f(x): return x\n```"
+    )
+
+    with patch.object(dc, "OPENROUTER_API_KEY", "test-key"), \
+            patch.object(classifier, "_request_classification") as request:
+        assert await classifier.classify("What is an atom?") == TaskDifficulty.SIMPLE
+        assert await classifier.classify(advanced, subtask_count=5) == TaskDifficulty.ADVANCED
+        request.assert_not_called()
+
+        # A short request that only matches an advanced keyword goes to the API
+        request.return_value = TaskDifficulty.ADVANCED
+        assert await classifier.classify("write a script") == TaskDifficulty.ADVANCED
+        request.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_openrouter_retries_transient_errors():
+    """Test rate limits and 5xx responses are retried before falling back."""
+    from coordinator import difficulty_classifier as dc
+
+    request = httpx.Request("POST", dc.OPENROUTER_BASE_URL)
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "0"}, request=request),
+        httpx.Response(503, request=request),
+        httpx.Response(200, json={"choices": [{"message": {"content": "COMPLEX"}}]}, request=request),
+    ]
+    classifier = dc.OpenRouterClassifier()
+
+    with patch.object(dc, "OPENROUTER_API_KEY", "test-key"), \
+            patch.object(dc, "CLASSIFICATION_RETRY_BASE_DELAY", 0), \
+            patch.object(httpx.AsyncClient, "post", side_effect=responses) as post:
+        difficulty = await classifier.classify("Tell me about atoms")
+
+    assert difficulty == TaskDifficulty.COMPLEX
+    assert post.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_openrouter_does_not_retry_client_errors():
+    """Test non-transient errors fall back to the local classifier at once."""
+    from coordinator import difficulty_classifier as dc
+
+    response = httpx.Response(401, request=httpx.Request("POST", dc.OPENROUTER_BASE_URL))
+    classifier = dc.OpenRouterClassifier()
+
+    with patch.object(dc, "OPENROUTER_API_KEY", "test-key"), \
+            patch.object(httpx.AsyncClient, "post", return_value=response) as post:
+        difficulty = await classifier.classify("Tell me about atoms")
+
+    assert difficulty == TaskDifficulty.SIMPLE
+    post.assert_called_once()
+
+
+def test_parse_classification_response():
+    """Test API replies map to difficulties, preferring the harder level."""
+    from coordinator import difficulty_classifier as dc
+
+    parse = dc.OpenRouterClassifier()._parse_classification_response
+    assert parse(" simple\n") == TaskDifficulty.SIMPLE
+    assert parse("COMPLEX") == TaskDifficulty.COMPLEX
+    assert parse("Not SIMPLE, this is ADVANCED.") == TaskDifficulty.ADVANCED
+    assert parse("no idea") is None
+
+
+def test_classification_text_is_compact_and_cut_on_words():
+    """Test the text sent to the API drops extra whitespace and whole words."""
+    from coordinator import difficulty_classifier as dc
+
+    assert dc._classification_text("  Explain\n\n  this   please ") == "Explain this please"
+
+    text = dc._classification_text("word " * 1000)
+    assert len(text) <= dc.CLASSIFICATION_MAX_PROMPT_CHARS
+    assert text.endswith("word")
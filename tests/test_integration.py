@@ -97,6 +97,69 @@ class TestUserWorkflow:
         assert task["status"] == "pending"
         assert task["original_prompt"] == "Test prompt"
 
+    @pytest.mark.asyncio
+    async def test_stats_are_cached_briefly(self, test_db):
+        """Test concurrent and repeated stats reads share one query."""
+        from coordinator import database
+
+        with patch.object(test_db, "_fetchone", wraps=test_db._fetchone) as fetchone:
+            first, second = await asyncio.gather(test_db.get_stats(), test_db.get_stats())
+            first["nodes_online"] = 3
+            assert "nodes_online" not in await test_db.get_stats()
+            assert fetchone.call_count == 1
+
+            with patch.object(database, "STATS_CACHE_TTL_SECONDS", 0):
+                test_db._stats_cache = None
+                await test_db.get_stats()
+                await test_db.get_stats()
+            assert fetchone.call_count == 3
+
+        assert second["total_users"] == 0
+
+    @pytest.mark.asyncio
+    async def test_subtask_counts(self, test_db):
+        """Test subtask counts come from one index-only aggregate."""
+        from shared.models import generate_id
+        from coordinator.database import SQL_GET_SUBTASK_COUNTS
+
+        user = await test_db.create_user(
+            id=generate_id(),
+            email="counts@example.com",
+            password_hash="hash"
+        )
+        task = await test_db.create_task(
+            id=generate_id(),
+            user_id=user["id"],
+            mode="subtasks",
+            original_prompt="Count me"
+        )
+        assert await test_db.get_subtask_counts(task["id"]) == (0, 0)
+
+        subtask_ids = [generate_id() for _ in range(3)]
+        for subtask_id in subtask_ids:
+            await test_db.create_subtask(id=subtask_id, task_id=task["id"], prompt="part")
+        # Completing the last one moves it first in idx_subtasks_task_status
+        await test_db.complete_subtask(
+            subtask_ids[-1],
+            response="done",
+            encrypted_response="enc",
+            execution_time_ms=10
+        )
+
+        assert await test_db.get_subtask_counts(task["id"]) == (1, 3)
+        assert [s["id"] for s in await test_db.get_subtasks_by_task(task["id"])] == subtask_ids
+
+        row, completed, total = await test_db.get_task_with_subtask_counts(task["id"])
+        assert row["original_prompt"] == "Count me"
+        assert (completed, total) == (1, 3)
+        assert await test_db.get_task_with_subtask_counts("missing") is None
+
+        async with test_db.conn.execute(
+            f"EXPLAIN QUERY PLAN {SQL_GET_SUBTASK_COUNTS}", (task["id"],)
+        ) as cursor:
+            plan = " ".join(row["detail"] for row in await cursor.fetchall())
+        assert "COVERING INDEX idx_subtasks_task_status" in plan
+
 
 class TestTaskOrchestration:
     """Tests for task orchestration flow."""
@@ -314,6 +377,82 @@ class TestEconomics:
         total = sum(s["amount"] for s in shares.values())
         assert abs(total - 1000.0) < 0.01
 
+    @pytest.mark.asyncio
+    async def test_distribute_records_all_earnings(self, test_db):
+        """Test distribution records one earning row per node."""
+        from coordinator.economics import EconomicsManager
+        from shared.models import generate_id
+
+        manager = EconomicsManager()
+
+        for i in range(3):
+            await test_db.create_node(
+                id=f"dist-node-{i}",
+                owner_id="owner",
+                public_key=f"key{i}",
+                model_name="model",
+                max_context=8192,
+                vram_gb=8.0
+            )
+
+        await test_db.create_economic_period(
+            id=generate_id(),
+            month="2025-02",
+            total_pool=300.0
+        )
+
+        with patch('coordinator.economics.db', test_db):
+            shares = await manager.distribute("2025-02")
+            summary = await manager.get_period_summary("2025-02")
+
+        assert len(shares) == 3
+        assert summary["nodes_paid"] == 3
+        assert summary["distributed"]
+        assert abs(summary["amount_distributed"] - 300.0) < 0.01
+
+    @pytest.mark.asyncio
+    async def test_preview_excludes_zero_reputation(self, test_db):
+        """Test preview only includes positive reputation, highest first."""
+        from coordinator.economics import EconomicsManager
+
+        manager = EconomicsManager()
+
+        for i, reputation in enumerate((50, 0, 150)):
+            await test_db.create_node(
+                id=f"preview-node-{i}",
+                owner_id="owner",
+                public_key=f"key{i}",
+                model_name="model",
+                max_context=8192,
+                vram_gb=8.0
+            )
+            await test_db.update_node_reputation(f"preview-node-{i}", reputation)
+
+        with patch('coordinator.economics.db', test_db):
+            preview = await manager.preview_distribution(100.0)
+
+        assert [p["node_id"] for p in preview] == ["preview-node-2", "preview-node-0"]
+        assert [p["projected_amount"] for p in preview] == [75.0, 25.0]
+
+    @pytest.mark.asyncio
+    async def test_top_nodes_are_limited_in_sql(self, test_db):
+        """Test the leaderboard query returns the best nodes, capped by limit."""
+        for i, reputation in enumerate((50, 0, 150)):
+            await test_db.create_node(
+                id=f"top-node-{i}",
+                owner_id="owner",
+                public_key=f"key{i}",
+                model_name="model",
+                max_context=8192,
+                vram_gb=8.0
+            )
+            await test_db.update_node_reputation(f"top-node-{i}", reputation)
+
+        top = await test_db.get_top_nodes(limit=2)
+
+        assert [n["id"] for n in top] == ["top-node-2", "top-node-0"]
+        assert set(top[0]) == {"id", "model_name", "reputation", "total_tasks_completed"}
+
 
 class TestProtocolMessages:
     """Tests for protocol message handling."""
@@ -457,3 +596,270 @@ class TestDatabaseOperations:
         subtask = await test_db.get_subtask_by_id(subtask_id)
         assert subtask["status"] == "completed"
         assert subtask["execution_time_ms"] == 500
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reads_use_pool(self, test_db):
+        """Test pooled readers see committed writes and run concurrently."""
+        from shared.models import generate_id
+
+        user = await test_db.create_user(
+            id=generate_id(),
+            email="pool@example.com",
+            password_hash="hash"
+        )
+
+        results = await asyncio.gather(*[
+            test_db.get_user_by_id(user["id"])
+            for _ in range(test_db.read_pool_size * 2)
+        ])
+
+        assert all(r["email"] == "pool@example.com" for r in results)
+        assert test_db._read_pool.qsize() == test_db.read_pool_size
+
+    @pytest.mark.asyncio
+    async def test_reads_without_pool_use_writer(self):
+        """Test read_pool_size=0 serves reads from the writer connection."""
+        from shared.models import generate_id
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = Database(
+                db_path=str(Path(tmpdir) / "nopool.db"),
+                read_pool_size=0,
+                checkpoint_interval=0
+            )
+            await db.connect()
+            try:
+                user = await db.create_user(
+                    id=generate_id(),
+                    email="nopool@example.com",
+                    password_hash="hash"
+                )
+                fetched = await asyncio.wait_for(db.get_user_by_id(user["id"]), 1)
+                assert fetched["email"] == "nopool@example.com"
+                assert db._read_pool is None
+            finally:
+                await db.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_reads_refuse_connections_from_another_process(self, test_db):
+        """Test pooled reads apply the same fork guard as writes."""
+        pid = test_db._pid
+        test_db._pid = -1
+        try:
+            with pytest.raises(RuntimeError, match="another process"):
+                await test_db.get_stats()
+        finally:
+            test_db._pid = pid
+
+    @pytest.mark.asyncio
+    async def test_write_statements_change_expected_rows(self, test_db):
+        """Test shared SQL constants touch exactly the targeted rows."""
+        from shared.models import generate_id
+
+        user_id = generate_id()
+        before = test_db.conn.total_changes
+        await test_db.create_user(
+            id=user_id,
+            email="changes@example.com",
+            password_hash="hash"
+        )
+        assert test_db.conn.total_changes == before + 1
+
+        await test_db.update_user_public_key(user_id, "pubkey")
+        assert test_db.conn.total_changes == before + 2
+
+        await test_db.update_user_public_key("missing-user", "pubkey")
+        assert test_db.conn.total_changes == before + 2
+
+    @pytest.mark.asyncio
+    async def test_transaction_rolls_back_on_error(self, test_db):
+        """Test writes inside a failed transaction are discarded."""
+        await test_db.create_node(
+            id="tx-node",
+            owner_id="owner",
+            public_key="key",
+            model_name="model",
+            max_context=8192,
+            vram_gb=8.0
+        )
+
+        with pytest.raises(RuntimeError):
+            async with test_db.transaction():
+                await test_db.update_node_reputation("tx-node", 50, _commit=False)
+                raise RuntimeError("boom")
+
+        node = await test_db.get_node_by_id("tx-node")
+        assert node["reputation"] == 100
+
+        async with test_db.transaction():
+            await test_db.update_node_reputation("tx-node", 75, _commit=False)
+            await test_db.log_reputation_change("tx-node", -25, "test", _commit=False)
+
+        node = await test_db.get_node_by_id("tx-node")
+        assert node["reputation"] == 75
+        assert len(await test_db.get_reputation_history("tx-node")) == 1
+
+    @pytest.mark.asyncio
+    async def test_transaction_isolates_concurrent_writes(self, test_db):
+        """Test writes from other tasks wait for an open transaction."""
+        await test_db.create_node(
+            id="tx-node",
+            owner_id="owner",
+            public_key="key",
+            model_name="model",
+            max_context=8192,
+            vram_gb=8.0
+        )
+
+        with pytest.raises(RuntimeError):
+            async with test_db.transaction():
+                await test_db.update_node_reputation("tx-node", 50, _commit=False)
+                # Reads inside the transaction see its own writes
+                assert (await test_db.get_node_by_id("tx-node"))["reputation"] == 50
+
+                other = asyncio.create_task(test_db.increment_node_tasks("tx-node"))
+                await asyncio.sleep(0.05)
+                assert not other.done()
+                raise RuntimeError("boom")
+
+        await other
+        node = await test_db.get_node_by_id("tx-node")
+        assert node["reputation"] == 100
+        assert node["total_tasks_completed"] == 1
+
+        with pytest.raises(RuntimeError, match="only valid inside"):
+            await test_db.update_node_reputation("tx-node", 50, _commit=False)
+
+    @pytest.mark.asyncio
+    async def test_node_token_lifecycle(self, test_db):
+        """Test enrollment tokens are read back through the database layer."""
+        from coordinator.node_tokens import NodeTokenManager
+
+        manager = NodeTokenManager(test_db)
+        token, token_id, _ = await manager.generate(label="first")
+        _, other_id, _ = await manager.generate(label="second")
+
+        assert (await manager.validate(token)).valid
+        assert await manager.consume(token, "enrolled-node")
+        assert not (await manager.validate(token)).valid
+        assert await manager.is_node_enrolled("enrolled-node")
+        assert await manager.get_token_for_node("enrolled-node") == token_id
+
+        assert await manager.revoke(other_id)
+        assert (await manager.get_token_info(other_id)).revoked
+        assert {t.id for t in await manager.list_tokens()} == {token_id}
+        assert await manager.list_tokens(include_used=False) == []
+        assert len(await manager.list_tokens(include_revoked=True)) == 2
+
+    @pytest.mark.asyncio
+    async def test_earnings_reads(self, test_db):
+        """Test per-node and per-period earnings queries."""
+        period = await test_db.create_economic_period("period-1", "2026-01", 100.0)
+        await test_db.record_node_earnings_bulk([
+            (period["id"], "node-a", 60.0, 60.0, 60.0),
+            (period["id"], "node-b", 40.0, 40.0, 40.0),
+        ])
+
+        earnings = await test_db.get_node_earnings("node-a")
+        assert [(e["month"], e["amount"]) for e in earnings] == [("2026-01", 60.0)]
+        assert await test_db.get_total_earnings("node-a") == 60.0
+        assert await test_db.get_total_earnings("missing") == 0.0
+
+        summary = await test_db.get_period_earnings_summary(period["id"])
+        assert (summary["nodes"], summary["distributed"]) == (2, 100.0)
+
+    @pytest.mark.asyncio
+    async def test_account_node_count_tracks_links(self, test_db):
+        """Test node_count follows nodes being linked and moved."""
+        await test_db.create_account("acct-1", "hash-1", "1111")
+        await test_db.create_account("acct-2", "hash-2", "2222")
+        await test_db.create_node(
+            id="count-node",
+            owner_id="owner",
+            public_key="key",
+            model_name="model",
+            max_context=8192,
+            vram_gb=8.0
+        )
+        assert await test_db.get_account_node_count("acct-1") == 0
+
+        await test_db.link_node_to_account("count-node", "acct-1")
+        assert await test_db.get_account_node_count("acct-1") == 1
+
+        await test_db.link_node_to_account("count-node", "acct-2")
+        assert await test_db.get_account_node_count("acct-1") == 0
+        assert await test_db.get_account_node_count("acct-2") == 1
+
+        assert await test_db.get_account_node_count("missing") == 0
+
+    @pytest.mark.asyncio
+    async def test_migrations_add_missing_columns(self, test_db):
+        """Test migrations only add columns that are missing."""
+        await test_db.conn.execute("ALTER TABLE nodes DROP COLUMN gpu_name")
+        await test_db.conn.commit()
+
+        await test_db._run_migrations()
+        # Running again must be a no-op rather than a duplicate-column error
+        await test_db._run_migrations()
+
+        async with test_db.conn.execute("PRAGMA table_info(nodes)") as cursor:
+            columns = {row["name"] for row in await cursor.fetchall()}
+        assert "gpu_name" in columns
+
+    @pytest.mark.asyncio
+    async def test_earnings_lookups_use_indexes(self, test_db):
+        """Test period and per-node earnings queries avoid full scans."""
+        from coordinator.database import SQL_GET_ECONOMIC_PERIOD_BY_MONTH
+
+        for sql, params, index in (
+            (SQL_GET_ECONOMIC_PERIOD_BY_MONTH, ("2025-01",), "idx_economic_periods_month"),
+            (
+                "SELECT SUM(amount) as total FROM node_earnings WHERE node_id = ?",
+                ("node-1",),
+                "COVERING INDEX idx_node_earnings_node_amount"
+            ),
+        ):
+            async with test_db.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params) as cursor:
+                plan = " ".join(row["detail"] for row in await cursor.fetchall())
+            assert index in plan
+
+    @pytest.mark.asyncio
+    async def test_tier_and_vision_lookups_use_indexes(self, test_db):
+        """Test tier and vision node lookups are served in index order."""
+        from coordinator.database import (
+            SQL_GET_NODES_BY_TIER,
+            SQL_GET_VISION_CAPABLE_NODES,
+        )
+
+        for sql, params, index in (
+            (SQL_GET_NODES_BY_TIER, ("basic",), "idx_nodes_tier_rep"),
+            (SQL_GET_VISION_CAPABLE_NODES, (), "idx_nodes_vision_rep"),
+        ):
+            async with test_db.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params) as cursor:
+                plan = " ".join(row["detail"] for row in await cursor.fetchall())
+            assert index in plan
+            assert "TEMP B-TREE" not in plan
+
+    @pytest.mark.asyncio
+    async def test_wal_checkpoint_truncates_log(self):
+        """Test the background checkpoint empties the WAL file."""
+        from shared.models import generate_id
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = Path(tmpdir) / "wal.db"
+            db = Database(db_path=str(db_path), checkpoint_interval=0.05)
+            await db.connect()
+            try:
+                await db.create_user(
+                    id=generate_id(),
+                    email="wal@example.com",
+                    password_hash="hash"
+                )
+                wal_path = Path(f"{db_path}-wal")
+                assert wal_path.stat().st_size > 0
+
+                await asyncio.sleep(0.2)
+                assert wal_path.stat().st_size == 0
+            finally:
+                await db.disconnect()
+            assert db._checkpoint_task is None
@@ -0,0 +1,133 @@
+"""
+Tests for the multimodal (PDF) processor.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from shared.models import FileAttachment
+from coordinator import multimodal_processor as mp
+
+
+def make_pdf(content: str = "JVBERi0xLjQ=") -> FileAttachment:
+    """Build a small PDF attachment."""
+    return FileAttachment(
+        filename="doc.pdf",
+        mime_type="application/pdf",
+        content_base64=content,
+        size_bytes=len(content)
+    )
+
+
+class TestPdfAnalysisCache:
+    """Tests for reuse of Gemini PDF analyses."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.processor = mp.MultimodalProcessor()
+        self.gemini = AsyncMock(return_value="extracted context")
+
+    async def process(self, pdf, prompt, **kwargs):
+        with patch.object(mp, "OPENROUTER_API_KEY", "test-key"), \
+                patch.object(self.processor, "_call_gemini", self.gemini):
+            return await self.processor.process_pdfs([pdf], prompt, **kwargs)
+
+    @pytest.mark.asyncio
+    async def test_identical_request_reuses_analysis(self):
+        """Test the same prompt over the same PDF calls Gemini once."""
+        first = await self.process(make_pdf(), "Summarize this")
+        second = await self.process(make_pdf(), "Summarize this")
+
+        assert first == second
+        assert "extracted context" in first
+        self.gemini.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_case_and_whitespace_variants_share_analysis(self):
+        """Test trivially reworded prompts reuse the analysis but keep their text."""
+        await self.process(make_pdf(), "Summarize this")
+        result = await self.process(make_pdf(), "  summarize\nTHIS ")
+
+        self.gemini.assert_awaited_once()
+        assert "summarize\nTHIS" in result
+
+    @pytest.mark.asyncio
+    async def test_different_prompt_or_pdf_misses(self):
+        """Test a changed prompt or PDF content is analysed again."""
+        await self.process(make_pdf(), "Summarize this")
+        await self.process(make_pdf(), "List the dates")
+        await self.process(make_pdf("JVBERi0xLjU="), "Summarize this")
+
+        assert self.gemini.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_cache_can_be_skipped_and_expires(self):
+        """Test use_cache=False and expired entries both call Gemini."""
+        await self.process(make_pdf(), "Summarize this")
+        await self.process(make_pdf(), "Summarize this", use_cache=False)
+        assert self.gemini.await_count == 2
+
+        with patch.object(mp, "GEMINI_CACHE_TTL", 0):
+            await self.process(make_pdf(), "List the dates")
+            await self.process(make_pdf(), "List the dates")
+        assert self.gemini.await_count == 4
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self):
+        """Test a failed Gemini call is retried on the next request."""
+        self.gemini.side_effect = [Exception("boom"), "extracted context"]
+
+        await self.process(make_pdf(), "Summarize this")
+        result = await self.process(make_pdf(), "Summarize this")
+
+        assert "extracted context" in result
+        assert self.gemini.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_multiple_pdfs_are_analysed_separately(self):
+        """Test each PDF gets its own call and failures only drop that file."""
+        other = make_pdf("JVBERi0xLjU=")
+        other.filename = "other.pdf"
+        self.gemini.side_effect = ["first context", Exception("boom")]
+
+        with patch.object(mp, "OPENROUTER_API_KEY", "test-key"), \
+                patch.object(self.processor, "_call_gemini", self.gemini):
+            result = await self.processor.process_pdfs([make_pdf(), other], "Summarize")
+
+            assert self.gemini.await_count == 2
+            assert "[doc.pdf]\nfirst context" in result
+            assert "[other.pdf]" not in result
+
+            # The successful file is cached on its own
+            self.gemini.side_effect = None
+            await self.processor.process_pdfs([make_pdf(), other], "Summarize")
+            assert self.gemini.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_large_pdfs_are_hashed_off_the_event_loop(self):
+        """Test cache keys for big attachments are computed in a worker thread."""
+        small, large = make_pdf(), make_pdf("A" * mp.CACHE_KEY_THREAD_THRESHOLD)
+
+        with patch.object(mp.asyncio, "to_thread", wraps=mp.asyncio.to_thread) as to_thread:
+            small_key = await self.processor._analysis_cache_key([small], "Summarize")
+            to_thread.assert_not_called()
+            large_key = await self.processor._analysis_cache_key([large], "Summarize")
+            to_thread.assert_called_once()
+
+        assert small_key != large_key
+        assert large_key == mp._digest_parts((self.processor.model, "summarize", large.content_base64))
+
+
+def test_pdfs_precede_the_prompt_text():
+    """Test file parts come first so requests on the same PDFs share a prefix."""
+    processor = mp.MultimodalProcessor()
+    pdf = make_pdf()
+
+    for build in (processor._build_direct_content, processor._build_content_parts):
+        first = build([pdf], "Summarize this")
+        second = build([pdf], "List the dates")
+        assert first[0] == second[0] == {
+            "type": "file",
+            "file": {"filename": "doc.pdf", "file_data": pdf.data_uri}
+        }
+        assert first[-1]["type"] == "text"
+        assert "List the dates" in second[-1]["text"]
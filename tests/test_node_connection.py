@@ -221,6 +221,34 @@ class TestHeartbeat:
         node = registry.get_node("heartbeat-test-node")
         assert node.current_load == 5
 
+    @pytest.mark.asyncio
+    async def test_heartbeat_persists_last_seen_periodically(self, registered_node):
+        """Test heartbeats only write last_seen_at once the interval has passed."""
+        from coordinator.node_registry import LAST_SEEN_PERSIST_INTERVAL
+
+        registry, db, mock_ws = registered_node
+
+        heartbeat_msg = ProtocolMessage.create(
+            MessageType.NODE_HEARTBEAT,
+            NodeHeartbeatPayload(
+                node_id="heartbeat-test-node",
+                current_load=1,
+                uptime_seconds=60
+            )
+        )
+
+        with patch('coordinator.node_registry.db', db), \
+             patch.object(db, 'update_node_last_seen', AsyncMock()) as update:
+            await registry.handle_heartbeat("heartbeat-test-node", heartbeat_msg)
+            update.assert_not_called()
+
+            node = registry.get_node("heartbeat-test-node")
+            node.last_seen_persisted_at -= LAST_SEEN_PERSIST_INTERVAL
+            await registry.handle_heartbeat("heartbeat-test-node", heartbeat_msg)
+            update.assert_awaited_once_with("heartbeat-test-node")
+
+        assert mock_ws.send_text.await_count == 3  # register ack + two heartbeat acks
+
 
 class TestNodeDisconnection:
     """Tests for node disconnection."""
@@ -2,7 +2,10 @@
 Tests for task orchestrator.
 """
 
+import asyncio
 import pytest
+from unittest.mock import patch
+from shared.models import TaskDifficulty
 from coordinator.task_orchestrator import TaskOrchestrator
 
 
@@ -220,3 +223,73 @@ class TestEdgeCases:
         subtasks = self.orchestrator._divide_into_subtasks(prompt)
 
         assert len(subtasks) >= 2
+
+
+class TestPendingSubtasks:
+    """Tests for waiting on in-flight subtasks."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.orchestrator = TaskOrchestrator()
+
+    @pytest.mark.asyncio
+    async def test_result_resolves_waiter(self):
+        """Test a result delivered while waiting completes the subtask."""
+        future = asyncio.get_running_loop().create_future()
+        self.orchestrator._pending_subtasks["sub-1"] = future
+
+        waiter = asyncio.create_task(self.orchestrator._wait_for_single_subtask(
+            subtask={"id": "sub-1"},
+            difficulty=TaskDifficulty.SIMPLE,
+            timeout=5,
+            assignments={}
+        ))
+        await asyncio.sleep(0)
+        self.orchestrator._resolve_pending_subtask("sub-1", "answer")
+        # Late duplicates are ignored
+        self.orchestrator._resolve_pending_subtask("sub-1", "again")
+
+        assert await waiter == "completed"
+        assert future.result() == "answer"
+
+    @pytest.mark.asyncio
+    async def test_reassigned_subtask_survives_first_timeout(self):
+        """Test the first timeout does not cancel the pending future."""
+        self.orchestrator._pending_subtasks["sub-2"] = (
+            asyncio.get_running_loop().create_future()
+        )
+
+        async def reassign(**kwargs):
+            asyncio.get_running_loop().call_later(
+                0.01, self.orchestrator._resolve_pending_subtask, "sub-2", "late answer"
+            )
+            return True
+
+        with patch.object(self.orchestrator, "_try_reassign_subtask", side_effect=reassign):
+            result = await self.orchestrator._wait_for_single_subtask(
+                subtask={"id": "sub-2"},
+                difficulty=TaskDifficulty.SIMPLE,
+                timeout=0.05,
+                assignments={}
+            )
+
+        assert result == "reassigned"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_wait_purges_pending_subtasks(self):
+        """Test cancelling a task's wait leaves no pending futures behind."""
+        waiter = asyncio.create_task(self.orchestrator._wait_for_completion(
+            task_id="task-1",
+            subtasks=[{"id": "sub-3"}, {"id": "sub-4"}],
+            difficulty=TaskDifficulty.SIMPLE,
+            assignments={},
+            timeout=5
+        ))
+        await asyncio.sleep(0)
+        assert set(self.orchestrator._pending_subtasks) == {"sub-3", "sub-4"}
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert self.orchestrator._pending_subtasks == {}